@@ -0,0 +1,234 @@
+'''
+benchmarks for hashing, walking and manifest workloads on synthetic fixtures.
+
+    python bench/benchmark.py --compare
+    python bench/benchmark.py --save
+
+throughput is reported in MB/s and files/s together with the peak memory
+allocated by python, a comparison exits with 1 if a workload regressed by
+more than the tolerance.
+
+without a filename both options use bench/baseline.json, which is recorded
+with the default scale. its throughput belongs to the machine it was recorded
+on, so on other hardware save a baseline of the unchanged code first.
+'''
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1] / 'src'))
+
+from pathlibutil import Path, PathList  # noqa: E402
+from pathlibutil.hashing import HashFile, HashSum, Manifest  # noqa: E402
+
+BASELINE = pathlib.Path(__file__).with_name('baseline.json')
+
+
+def fixtures(root: Path, scale: float) -> Dict[str, Path]:
+    ''' many tiny files, a few huge files, a deep tree and a wide directory '''
+    tiny = root / 'tiny'
+    for i in range(int(2000 * scale)):
+        file = tiny / f"{i % 20:02}" / f"file{i}.txt"
+        file.touch(parents=True)
+        file.write_bytes(os.urandom(64) + b'\n')
+
+    huge = root / 'huge'
+    huge.mkdir()
+    line = b'0123456789abcdef' * 7 + b'\r\n'
+    for i in range(2):
+        with huge.joinpath(f"huge{i}.log").open(mode='wb') as f:
+            for _ in range(int(32 * scale)):
+                f.write(line * (2**20 // len(line)))
+
+    deep = root / 'deep'
+    directory = deep
+    for i in range(int(100 * scale)):
+        directory = directory / f"level{i}"
+        directory.joinpath('file.txt').touch(parents=True)
+
+    wide = root / 'wide'
+    wide.mkdir()
+    for i in range(int(10000 * scale)):
+        wide.joinpath(f"entry{i}.dat").touch()
+
+    return {'tiny': tiny, 'huge': huge, 'deep': deep, 'wide': wide, 'root': root}
+
+
+def workloads(paths: Dict[str, Path]) -> Dict[str, Callable[[], Tuple[int, int]]]:
+    ''' each workload returns the number of processed (bytes, files) '''
+    huge = sorted(paths['huge'].iterdir())
+    tiny = PathList(paths['tiny'].rglob('*.txt'))
+    manifest = paths['root'] / 'tiny.md5'
+
+    HashSum(tiny, manifest)
+
+    def hexdigest():
+        for file in huge:
+            file.hexdigest('sha256')
+
+        return sum(f.stat().st_size for f in huge), len(huge)
+
+    def digests():
+        for file in huge:
+            file.digests(['md5', 'sha256'])
+
+        return sum(f.stat().st_size for f in huge), len(huge)
+
+    def eol_count():
+        for file in huge:
+            file.eol_counts()
+
+        return sum(f.stat().st_size for f in huge), len(huge)
+
+    def rglob():
+        files = 0
+        for key in ('deep', 'wide', 'tiny'):
+            files += sum(1 for _ in paths[key].rglob('*', exclude=['*/.git/*']))
+
+        return 0, files
+
+    def getsize():
+        size = paths['root'].getsize()
+
+        return size, sum(1 for _ in paths['root'].iterdir(recursive=True))
+
+    def apply():
+        digests = tiny.apply(lambda x: x.hexdigest('md5'))
+
+        return sum(f.stat().st_size for f in tiny), len(digests)
+
+    def hashfile():
+        h = HashFile(manifest)
+        files = sum(1 for _ in h.verify())
+
+        return sum(f.stat().st_size for f in tiny), files
+
+    def manifest_verify():
+        m = Manifest(manifest)
+        files = sum(1 for _ in m.verify())
+
+        return sum(f.stat().st_size for f in tiny), files
+
+    return {
+        'hexdigest': hexdigest,
+        'digests': digests,
+        'eol_count': eol_count,
+        'rglob': rglob,
+        'getsize': getsize,
+        'apply': apply,
+        'hashfile': hashfile,
+        'manifest': manifest_verify,
+    }
+
+
+def measure(func: Callable[[], Tuple[int, int]], repeat: int) -> Dict[str, float]:
+    ''' best time of several runs and the lowest peak memory of as many traced runs '''
+    elapsed = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size, files = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    # the peak of a single run depends on how many results of the thread pools are in flight
+    peak = float('inf')
+
+    for _ in range(repeat):
+        tracemalloc.start()
+        try:
+            func()
+            peak = min(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'seconds': elapsed,
+        'mb_per_s': size / 2**20 / elapsed,
+        'files_per_s': files / elapsed,
+        'peak_kb': peak / 2**10,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> list[str]:
+    ''' lower throughput or higher memory than the baseline allows '''
+    regressions = list()
+
+    for name, result in results.items():
+        try:
+            base = baseline[name]
+        except KeyError:
+            continue
+
+        for key in ('mb_per_s', 'files_per_s'):
+            if base[key] and result[key] < base[key] * (1 - tolerance):
+                regressions.append(
+                    f"{name}: {key} {result[key]:.1f} < {base[key]:.1f}")
+
+        if result['peak_kb'] > base['peak_kb'] * (1 + tolerance) + 64:
+            regressions.append(
+                f"{name}: peak_kb {result['peak_kb']:.0f} > {base['peak_kb']:.0f}")
+
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='size factor of the generated fixtures')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--select', nargs='*', help='run only these workloads')
+    parser.add_argument('--save', metavar='JSON', nargs='?', const=BASELINE,
+                        help=f"store results as baseline, default {BASELINE.name}")
+    parser.add_argument('--compare', metavar='JSON', nargs='?', const=BASELINE,
+                        help=f"compare with a baseline, default {BASELINE.name}")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pathlibutil-bench-') as tmp:
+        paths = fixtures(Path(tmp), args.scale)
+
+        results = dict()
+        for name, func in workloads(paths).items():
+            if args.select and name not in args.select:
+                continue
+
+            results[name] = measure(func, args.repeat)
+
+            r = results[name]
+            print(f"{name:<10} {r['seconds']:8.3f} s {r['mb_per_s']:10.1f} MB/s "
+                  f"{r['files_per_s']:12.0f} files/s {r['peak_kb']:10.0f} KiB")
+
+    results = {'scale': args.scale, 'results': results}
+
+    if args.save:
+        with open(args.save, mode='wt', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, mode='rt', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        if baseline.get('scale') != args.scale:
+            print(f"baseline was recorded with scale {baseline.get('scale')}")
+            return 2
+
+        regressions = compare(
+            results['results'], baseline['results'], args.tolerance)
+
+        for line in regressions:
+            print(f"REGRESSION {line}")
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
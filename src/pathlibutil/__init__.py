@@ -1,2 +1,2 @@
-from .pathlist import PathList
+from .pathlist import LazyPathList, PathList
 from .pathutil import Path
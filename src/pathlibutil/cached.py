@@ -1,63 +1,250 @@
+import asyncio
+import collections
 import functools
 import hashlib
+import os
+import sys
+import threading
+from typing import Any, Dict, Tuple
 
+from . import metrics
+from .digest import Digest
 from .pathlist import PathList as _PathList
 from .pathutil import Path as _Path
 
 
+class LRUCache:
+    ''' thread-safe least recently used cache limited by number of entries and bytes '''
+
+    def __init__(self, maxsize: int = 2**16, maxbytes: int = 2**26):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+
+        self._data = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = collections.Counter()
+        self._misses = collections.Counter()
+        self._evictions = collections.Counter()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(maxsize={self.maxsize}, maxbytes={self.maxbytes})"
+
+    @classmethod
+    def sizeof(cls, value: Any) -> int:
+        ''' approximated memory usage of a cached value '''
+        size = sys.getsizeof(value)
+
+        if isinstance(value, dict):
+            size += sum(sys.getsizeof(k) + cls.sizeof(v)
+                        for k, v in value.items())
+
+        return size
+
+    def get(self, key: Tuple, name: str, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value, _, _ = self._data[key]
+            except KeyError:
+                self._misses[name] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._hits[name] += 1
+
+        return value
+
+    def set(self, key: Tuple, name: str, value: Any) -> None:
+        size = sys.getsizeof(key) + self.sizeof(value)
+
+        with self._lock:
+            try:
+                _, old, _ = self._data.pop(key)
+                self._bytes -= old
+            except KeyError:
+                pass
+
+            self._data[key] = (value, size, name)
+            self._bytes += size
+
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._data and (len(self._data) > self.maxsize or self._bytes > self.maxbytes):
+            _, (_, size, name) = self._data.popitem(last=False)
+            self._bytes -= size
+            self._evictions[name] += 1
+
+    def resize(self, maxsize: int = None, maxbytes: int = None) -> None:
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+
+            if maxbytes is not None:
+                self.maxbytes = maxbytes
+
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+            self._hits.clear()
+            self._misses.clear()
+            self._evictions.clear()
+
+    def info(self, name: str = None) -> Dict[str, int]:
+        with self._lock:
+            if name:
+                return {
+                    'hits': self._hits[name],
+                    'misses': self._misses[name],
+                    'evictions': self._evictions[name],
+                }
+
+            return {
+                'hits': self._hits.total(),
+                'misses': self._misses.total(),
+                'evictions': self._evictions.total(),
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'maxsize': self.maxsize,
+                'maxbytes': self.maxbytes,
+            }
+
+
+_cache = LRUCache()
+
+_missing = object()
+
+
+def freeze(value: Any) -> Any:
+    ''' keep only the final digest bytes, variable length digests can not be cached '''
+    if isinstance(value, dict):
+        frozen = {key: freeze(item) for key, item in value.items()}
+
+        if any(item is None for item in frozen.values()):
+            return None
+
+        return frozen
+
+    try:
+        if value.digest_size == 0:
+            return None
+    except AttributeError:
+        return value
+
+    if isinstance(value, Digest):
+        return value
+
+    return Digest(value.name, value.digest())
+
+
+def _key(stat: os.stat_result, name: str, args: Tuple, kwargs: Dict) -> Tuple:
+    return (
+        stat.st_dev,
+        stat.st_ino,
+        stat.st_size,
+        stat.st_mtime_ns,
+        name,
+        args,
+        # the number of workers does not change a digest
+        tuple(sorted(item for item in kwargs.items() if item[0] != '_workers')),
+    )
+
+
+def _lookup(key: Tuple, name: str) -> Any:
+    value = _cache.get(key, name, _missing)
+
+    if (m := metrics.active) is not None:
+        m.emit('stat')
+        m.emit('cache_miss' if value is _missing else 'cache_hit')
+
+    return value
+
+
+def _store(key: Tuple, name: str, value: Any) -> Any:
+    frozen = freeze(value)
+
+    if frozen is None:
+        return value
+
+    _cache.set(key, name, frozen)
+
+    return frozen
+
+
 def cache(func):
     @functools.wraps(func)
     def cached(self, *args, **kwargs):
-        try:
-            lock = (self.mtime, self)
-        except AttributeError:
-            lock = self
-
-        try:
-            func_cache = self.__cache__[lock]
-        except (AttributeError, KeyError):
-            func_cache = dict()
-            self.__cache__ = {lock: func_cache}
-
-        try:
-            args_cache = func_cache[func.__name__]
-        except KeyError:
-            args_cache = dict()
-            self.__cache__[lock][func.__name__] = args_cache
-
-        # key = args + tuple(sorted(kwargs.items()))
-        key = args
-        try:
-            value = args_cache[key]
-        except KeyError:
-            value = func(self, *args, **kwargs)
-            args_cache[key] = value
+        key = _key(self.stat(), func.__name__, args, kwargs)
+
+        value = _lookup(key, func.__name__)
+
+        if value is _missing:
+            value = _store(key, func.__name__, func(self, *args, **kwargs))
 
         return value
 
     return cached
 
 
+def acache(name: str):
+    ''' cache for coroutines, which shares its entries with the synchronous method name '''
+    def decorator(func):
+        @functools.wraps(func)
+        async def cached(self, *args, **kwargs):
+            stat = await asyncio.to_thread(self.stat)
+            key = _key(stat, name, args, kwargs)
+
+            value = _lookup(key, name)
+
+            if value is _missing:
+                value = _store(key, name, await func(self, *args, **kwargs))
+
+            return value
+
+        return cached
+
+    return decorator
+
+
 class Path(_Path):
 
-    def cached(self, func: str = None) -> dict:
-        try:
-            cache, *_ = self.__cache__.values()
+    @staticmethod
+    def cached(func: str = None) -> Dict[str, int]:
+        ''' hit, miss and eviction counters of the process-wide cache '''
+        return _cache.info(func)
+
+    @staticmethod
+    def cache_limits(maxsize: int = None, maxbytes: int = None) -> None:
+        ''' change the number of entries and bytes of the process-wide cache '''
+        _cache.resize(maxsize, maxbytes)
+
+    @staticmethod
+    def cache_clear() -> None:
+        _cache.clear()
 
-            if func:
-                return cache[func]
-            else:
-                return cache
-        except (AttributeError, KeyError) as e:
-            return dict()
+    @cache
+    def _counts(self, patterns: Tuple[bytes, ...], /, *, size: int) -> Dict[bytes, int]:
+        return super()._counts(patterns, size=size)
 
     @cache
-    def _count(self, substr: str, /, *, size: int) -> int:
-        return super()._count(substr, size=size)
+    def _file_digest(self, algorithm: str, /, *, _bufsize: int, _workers: int = None) -> 'hashlib._Hash':
+        return super()._file_digest(algorithm, _bufsize=_bufsize, _workers=_workers)
+
+    @acache('_file_digest')
+    async def _afile_digest(self, algorithm: str, /, *, _bufsize: int) -> 'hashlib._Hash':
+        return await super()._afile_digest(algorithm, _bufsize=_bufsize)
 
     @cache
-    def _file_digest(self, algorithm: str, /, *, _bufsize: int) -> 'hashlib._Hash':
-        return super()._file_digest(algorithm, _bufsize=_bufsize)
+    def _file_digests(self, algorithms: Tuple[str, ...], /, *, _bufsize: int) -> Dict[str, 'hashlib._Hash']:
+        return super()._file_digests(algorithms, _bufsize=_bufsize)
 
 
 class PathList(_PathList):
@@ -0,0 +1,144 @@
+import errno
+import os
+import shutil
+import stat
+from typing import Optional, Tuple, Union
+
+PathLike = Union[str, os.PathLike]
+
+# errors of os.copy_file_range when the kernel or filesystem can not copy in-kernel
+_fallback = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+    errno.ETXTBSY,
+}
+
+
+def _destination(src: str, dst: str) -> str:
+    if not os.path.isfile(src):
+        raise FileNotFoundError(
+            errno.ENOENT, "can't copy, doesn't exist or not a regular file", src)
+
+    if os.path.isdir(dst):
+        return os.path.join(dst, os.path.basename(src))
+
+    return dst
+
+
+def _newer(src: str, dst: str) -> bool:
+    try:
+        target = os.stat(dst).st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+    return os.stat(src).st_mtime_ns > target
+
+
+def _copy_contents(src: str, dst: str) -> None:
+    ''' in-kernel copy with os.copy_file_range, otherwise shutil.copyfile which uses sendfile where available '''
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                infd, outfd = fsrc.fileno(), fdst.fileno()
+                size = os.fstat(infd).st_size
+                copied = 0
+
+                while n := os.copy_file_range(infd, outfd, 2**30):
+                    copied += n
+
+            # some kernels return 0 at once across filesystems or for procfs and FUSE sources
+            if copied and copied >= size:
+                return
+        except OSError as e:
+            if e.errno not in _fallback:
+                raise
+
+    shutil.copyfile(src, dst)
+
+
+def _preserve(src: str, dst: str, preserve_mode: bool, preserve_times: bool) -> None:
+    if not (preserve_mode or preserve_times):
+        return
+
+    st = os.stat(src)
+
+    if preserve_times:
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    if preserve_mode:
+        os.chmod(dst, stat.S_IMODE(st.st_mode))
+
+
+def copy_file(src: PathLike, dst: PathLike, preserve_mode: bool = True, preserve_times: bool = True, update: bool = False, link: Optional[str] = None, verbose: bool = False, dry_run: bool = False) -> Tuple[str, int]:
+    '''
+    drop-in replacement for distutils.file_util.copy_file, returns (destination, copied).
+
+    with update the file is only copied if src is newer than dst, link is 'hard' or 'sym'
+    and verbose is only accepted for compatibility.
+    '''
+    src, dst = os.fspath(src), os.fspath(dst)
+    dst = _destination(src, dst)
+
+    if update and not _newer(src, dst):
+        return (dst, 0)
+
+    if dry_run:
+        return (dst, 1)
+
+    if link in ('hard', 'sym'):
+        if not (os.path.exists(dst) and os.path.samefile(src, dst)):
+            try:
+                if link == 'hard':
+                    os.link(src, dst)
+                else:
+                    os.symlink(src, dst)
+
+                return (dst, 1)
+            except OSError:
+                if link == 'sym':
+                    raise
+    elif link is not None:
+        raise ValueError(f"invalid value '{link}' for 'link' argument")
+
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"'{src}' and '{dst}' are the same file")
+
+    _copy_contents(src, dst)
+    _preserve(src, dst, preserve_mode, preserve_times)
+
+    return (dst, 1)
+
+
+def move_file(src: PathLike, dst: PathLike, preserve_mode: bool = True, preserve_times: bool = True, update: bool = False, verbose: bool = False, dry_run: bool = False) -> Tuple[str, int]:
+    ''' renames src when dst is on the same device, otherwise copies and deletes it, returns (destination, moved) '''
+    src, dst = os.fspath(src), os.fspath(dst)
+    dst = _destination(src, dst)
+
+    if update and not _newer(src, dst):
+        return (dst, 0)
+
+    if dry_run:
+        return (dst, 1)
+
+    parent = os.path.dirname(os.path.abspath(dst))
+
+    if os.stat(src).st_dev == os.stat(parent).st_dev:
+        try:
+            os.replace(src, dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        else:
+            if not preserve_times:
+                os.utime(dst)
+
+            return (dst, 1)
+
+    copy_file(src, dst, preserve_mode=preserve_mode,
+              preserve_times=preserve_times)
+    os.unlink(src)
+
+    return (dst, 1)
@@ -0,0 +1,171 @@
+import concurrent.futures as cf
+import hashlib
+import os
+from typing import Any, BinaryIO, Dict, Self, Union
+
+from . import metrics
+
+
+class Digest:
+    ''' final value of a hash calculation with the read-only interface of hashlib._Hash '''
+    __slots__ = ('name', '_digest')
+
+    def __init__(self, name: str, digest: bytes):
+        self.name = name
+        self._digest = bytes(digest)
+
+    @property
+    def digest_size(self) -> int:
+        return len(self._digest)
+
+    def digest(self) -> bytes:
+        return self._digest
+
+    def hexdigest(self) -> str:
+        return self._digest.hex()
+
+    def copy(self) -> Self:
+        return self
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self.name == other.name and self._digest == other.digest()
+        except AttributeError:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.name, self._digest))
+
+    def __sizeof__(self) -> int:
+        return super().__sizeof__() + self._digest.__sizeof__()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.name}', '{self.hexdigest()}')"
+
+
+BLAKE2B_TREE = 'blake2b-tree'
+
+# changing the leaf size changes the digest, it is part of the tree parameters
+LEAF_SIZE = 2**24
+
+
+def _blake2b_params(leaf_size: int, **kwargs) -> Dict[str, Any]:
+    return dict(digest_size=64, fanout=0, depth=2, leaf_size=leaf_size, inner_size=64, **kwargs)
+
+
+class Blake2bTree:
+    '''
+    sequential form of blake2b_tree with the update interface of hashlib, so the tree digest
+    can be calculated alongside other algorithms from the same reads. whether a leaf is the
+    last node is only known at the end, so the data of the current leaf is buffered.
+    '''
+    name = BLAKE2B_TREE
+    digest_size = 64
+
+    def __init__(self, data: bytes = b'', leaf_size: int = LEAF_SIZE):
+        self._leaf_size = leaf_size
+        self._leaf = bytearray()
+        self._index = 0
+        self._root = hashlib.blake2b(**_blake2b_params(leaf_size, node_depth=1, last_node=True))
+
+        self.update(data)
+
+    def _node(self, last: bool) -> bytes:
+        params = _blake2b_params(
+            self._leaf_size, node_offset=self._index, node_depth=0, last_node=last)
+
+        return hashlib.blake2b(self._leaf, **params).digest()
+
+    def update(self, data: bytes) -> None:
+        view = memoryview(data).cast('B')
+
+        while view:
+            if len(self._leaf) == self._leaf_size:
+                self._root.update(self._node(last=False))
+                self._leaf.clear()
+                self._index += 1
+
+            n = self._leaf_size - len(self._leaf)
+            self._leaf += view[:n]
+            view = view[n:]
+
+    def digest(self) -> bytes:
+        root = self._root.copy()
+        root.update(self._node(last=True))
+
+        return root.digest()
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+
+def _blake2b_leaf(file: BinaryIO, offset: int, length: int, bufsize: int, params: Dict[str, Any]) -> bytes:
+    ''' hashes a byte range with positioned reads, so leaves can share one file descriptor '''
+    h = hashlib.blake2b(**params)
+
+    if hasattr(os, 'pread'):
+        fd = file.fileno()
+
+        def read(size: int, position: int) -> bytes:
+            return os.pread(fd, size, position)
+    else:
+        f = open(file.name, mode='rb', buffering=0)
+
+        def read(size: int, position: int) -> bytes:
+            f.seek(position)
+            return f.read(size)
+
+    position, end = offset, offset + length
+
+    try:
+        while position < end and (chunk := read(min(bufsize, end - position), position)):
+            h.update(chunk)
+            position += len(chunk)
+    finally:
+        if not hasattr(os, 'pread'):
+            f.close()
+
+    if (m := metrics.active) is not None:
+        m.emit('bytes_read', position - offset)
+
+    return h.digest()
+
+
+def blake2b_tree(filename: Union[str, os.PathLike], bufsize: int = 2**20, workers: int = None, leaf_size: int = LEAF_SIZE) -> Digest:
+    '''
+    parallel digest of a single file with the tree mode of blake2b.
+
+    the file is split into leaves of leaf_size bytes, each hashed with fanout=0, depth=2,
+    inner_size=64, node_depth=0, node_offset=index and last_node set on the final leaf.
+    the 64 byte leaf digests are concatenated into the root node with node_depth=1 and
+    last_node=True, an empty file has a single empty leaf. leaves are read with positioned
+    reads and hashed by up to workers threads, blake2b releases the GIL while hashing.
+    '''
+    with open(filename, mode='rb', buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        count = max(1, -(-size // leaf_size))
+
+        def leaf(index: int) -> bytes:
+            params = _blake2b_params(leaf_size, node_offset=index, node_depth=0, last_node=index == count - 1)
+
+            return _blake2b_leaf(f, index * leaf_size, leaf_size, bufsize, params)
+
+        if count == 1 or workers == 1:
+            leaves = map(leaf, range(count))
+        else:
+            exec = cf.ThreadPoolExecutor(workers)
+            leaves = exec.map(leaf, range(count))
+
+        root = hashlib.blake2b(**_blake2b_params(leaf_size, node_depth=1, last_node=True))
+
+        try:
+            for value in leaves:
+                root.update(value)
+        finally:
+            if count > 1 and workers != 1:
+                exec.shutdown(cancel_futures=True)
+
+    if (m := metrics.active) is not None:
+        m.emit('files_hashed')
+
+    return Digest(BLAKE2B_TREE, root.digest())
@@ -1,14 +1,29 @@
+import functools
+import json
+import os
 import re
-from typing import Dict, Generator, Iterable, List, Self, Tuple
+import sys
+from typing import Dict, Generator, Iterable, Iterator, List, Self, Tuple
 
+from . import metrics
 from .pathlist import PathList
 from .pathutil import Path
 
 
+def _hexdigest(algorithm: str, file: Path) -> str:
+    return file.hexdigest(algorithm).upper()
+
+
+def _hexdigests(algorithms: Tuple[str, ...], file: Path) -> Dict[str, str]:
+    return file.hexdigests(algorithms)
+
+
 class HashList:
-    def __init__(self, files: str, algorithm: str = None):
+    def __init__(self, files: str, algorithm: str = None, **kwargs):
+        ''' kwargs are passed to PathList.apply, e.g. executor='processes' for cpu-bound algorithms '''
         self.files = PathList(files)
         self.algorithm = Path.algorithm(algorithm)
+        self.apply_kwargs = kwargs
 
     @property
     def filedigest(self) -> Dict[Path, str]:
@@ -24,16 +39,42 @@ def hexdigest(self) -> List[str]:
         try:
             return self._hexdigest
         except AttributeError:
-            def digest(x: Path):
-                try:
-                    return x.hexdigest(self.algorithm).upper()
-                except (FileNotFoundError, PermissionError):
-                    return None
+            digest = functools.partial(_hexdigest, self.algorithm)
+
+            m = metrics.active
+
+            if m is None:
+                self._hexdigest = self.files.apply(digest, **self.apply_kwargs)
+            else:
+                total = len(self.files)
+                results = self.files.apply_iter(
+                    digest, ordered=True, **self.apply_kwargs)
 
-            self._hexdigest = self.files.apply(digest)
+                self._hexdigest = list()
+                for done, (file, result) in enumerate(results, start=1):
+                    self._hexdigest.append(result)
+                    m.emit('progress', path=file, done=done, total=total)
 
         return self._hexdigest
 
+    def hexdigests(self, algorithms: Iterable[str]) -> Dict[str, List[str]]:
+        ''' hashsums for several algorithms, every file is read only once '''
+        algorithms = tuple(dict.fromkeys(map(Path.algorithm, algorithms)))
+
+        digest = functools.partial(_hexdigests, algorithms)
+
+        results = self.files.apply(digest, **self.apply_kwargs)
+
+        hexdigests = {
+            algorithm: [r[algorithm].upper() if r else None for r in results]
+            for algorithm in algorithms
+        }
+
+        if self.algorithm in hexdigests and not hasattr(self, '_hexdigest'):
+            self._hexdigest = hexdigests[self.algorithm]
+
+        return hexdigests
+
     def missing(self):
         for file, hash in self:
             if hash:
@@ -59,18 +100,18 @@ def __repr__(self):
 
 
 class HashSum(HashList):
-    def __init__(self, files: Iterable, hashfile: str, algorithm: str = None, comments: str = None, relative: bool = False):
+    def __init__(self, files: Iterable, hashfile: str, algorithm: str = None, comments: str = None, relative: bool = False, incremental: bool = False, **kwargs):
 
         self.root = Path(hashfile)
 
         if not algorithm:
             algorithm = self.root.suffix
 
-        super().__init__(files, algorithm)
+        super().__init__(files, algorithm, **kwargs)
 
         self.comments = comments
 
-        self.save(self.root, relative=relative)
+        self.save(self.root, relative=relative, incremental=incremental)
 
     def __repr__(self):
         files = [str(f) for f in self.files]
@@ -100,12 +141,80 @@ def items(self) -> Tuple[Path, str]:
         for file, hash in self:
             yield file, hash
 
-    def save(self, filename: str, comments: str = None, relative: bool = False) -> None:
+    @staticmethod
+    def sidecar(hashfile: Path) -> Path:
+        ''' file with size and modification time of each entry in a hashfile '''
+        return hashfile.with_name(f"{hashfile.name}.stat")
+
+    def _stats(self) -> Dict[str, List[int]]:
+        stats = dict()
+
+        for file in self.files:
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+
+            stats[str(file.resolve())] = [stat.st_size, stat.st_mtime_ns]
+
+        return stats
+
+    def _reuse(self, hashfile: Path, stats: Dict[str, List[int]]) -> None:
+        ''' take hashsums of unchanged files from an existing hashfile and rehash the others '''
+        try:
+            with self.sidecar(hashfile).open(mode='rt', encoding='utf-8') as f:
+                previous = json.load(f)
+
+            if previous['algorithm'] != self.algorithm:
+                raise ValueError(previous['algorithm'])
+
+            unchanged = dict(previous['files'])
+
+            old = HashFile(hashfile, self.algorithm)
+        except (FileNotFoundError, KeyError, TypeError, ValueError):
+            # the sidecar is only a cache, anything unexpected means a full rehash
+            return
+
+        known = {str(file): hash.upper()
+                 for file, hash in zip(old.files, old.hashes)}
+
+        hexdigest = list()
+        changed = list()
+
+        for i, file in enumerate(self.files):
+            key = str(file.resolve())
+
+            try:
+                if key not in stats or unchanged[key] != stats[key]:
+                    raise KeyError(key)
+
+                hexdigest.append(known[key])
+            except KeyError:
+                hexdigest.append(None)
+                changed.append(i)
+
+        digest = functools.partial(_hexdigest, self.algorithm)
+        files = PathList(self.files[i] for i in changed)
+
+        for i, result in zip(changed, files.apply(digest, **self.apply_kwargs)):
+            hexdigest[i] = result
+
+        self._hexdigest = hexdigest
+        self.__dict__.pop('_filedigest', None)
+
+    def save(self, filename: str, comments: str = None, relative: bool = False, incremental: bool = False) -> None:
+        ''' with incremental only new or modified files are hashed, unchanged ones are taken from the existing hashfile '''
+        root = Path(filename).resolve().with_suffix(
+            self.algorithm, separator=True)
+
+        if incremental:
+            stats = self._stats()
+            self._reuse(root, stats)
+
         if not all(self.hexdigest):
             raise FileNotFoundError(list(self.missing()))
 
-        self.root = Path(filename).resolve().with_suffix(
-            self.algorithm, separator=True)
+        self.root = root
 
         if not comments:
             comments = self.comments
@@ -131,12 +240,21 @@ def save(self, filename: str, comments: str = None, relative: bool = False) -> N
 
                 f.write(f"{hash} *{filename}\n")
 
+        sidecar = self.sidecar(self.root)
+
+        if not incremental:
+            sidecar.unlink(missing_ok=True)
+            return
+
+        with sidecar.open(mode='wt', encoding='utf-8') as f:
+            json.dump({'algorithm': self.algorithm, 'files': stats}, f)
+
 
 class HashFile(HashSum):
     regex = re.compile(
         r'^(?P<hash>[0-9a-f]{8,}) \*(?P<file>.*?)$', re.IGNORECASE)
 
-    def __init__(self, filename: str, algorithm: str = None):
+    def __init__(self, filename: str, algorithm: str = None, **kwargs):
         self._comments = list()
 
         files = list()
@@ -169,7 +287,7 @@ def __init__(self, filename: str, algorithm: str = None):
             files.append(file)
             self._hashes.append(hash)
 
-        super(HashSum, self).__init__(files, algorithm)
+        super(HashSum, self).__init__(files, algorithm, **kwargs)
 
     def __repr__(self):
         return f"{self.__class__.__name__}('{self.root}', algorithm='{self.algorithm}')"
@@ -220,3 +338,172 @@ def modified(self):
 
             if hash != digest:
                 yield file
+
+    def verify(self, fail_fast: bool = False, **kwargs) -> Iterator[Tuple[Path, str]]:
+        ''' hashes files lazily and yields (file, 'match' | 'modified' | 'missing') as soon as the verdict is known '''
+        hashes = dict(zip(self.files, self.hashes))
+
+        digest = functools.partial(_hexdigest, self.algorithm)
+        results = self.files.apply_iter(
+            digest, **{**self.apply_kwargs, **kwargs})
+
+        try:
+            for file, digest in results:
+                if not digest:
+                    verdict = 'missing'
+                elif digest == hashes[file].upper():
+                    verdict = 'match'
+                else:
+                    verdict = 'modified'
+
+                yield file, verdict
+
+                if fail_fast and verdict != 'match':
+                    break
+        finally:
+            results.close()
+
+    def changed(self, **kwargs) -> bool:
+        ''' stops hashing at the first modified or missing file '''
+        for _, verdict in self.verify(fail_fast=True, **kwargs):
+            if verdict != 'match':
+                return True
+
+        return False
+
+
+def _rawdigest(algorithm: str, length: int, file: Path) -> bytes:
+    return bytes.fromhex(file.hexdigest(algorithm, length=length))
+
+
+class Manifest:
+    '''
+    read-only hashfile for millions of entries, digests are kept as raw bytes in a single
+    buffer and file names as basenames with interned directories, files become Path
+    objects only on access. relative names are joined with the directory of the hashfile
+    and normalized, but unlike HashFile not resolved.
+    '''
+
+    def __init__(self, filename: str, algorithm: str = None):
+        self.root = Path(filename).resolve()
+
+        if not algorithm:
+            algorithm = self.root.suffix
+
+        self.algorithm = Path.algorithm(algorithm)
+        self.comments = list()
+        self.digest_size = None
+
+        self._dirs = list()
+        self._names = list()
+        self._digests = bytearray()
+        self._index = None
+
+        parent = os.fspath(self.root.parent)
+
+        for line in self.root.iter_lines(encoding='utf-8'):
+            if not line:
+                continue
+
+            if line.startswith('#'):
+                self.comments.append(HashSum.strip_comments(line))
+                continue
+
+            match = HashFile.regex.match(line)
+
+            if not match:
+                continue
+
+            digest = bytes.fromhex(match.group('hash'))
+
+            if self.digest_size is None:
+                self.digest_size = len(digest)
+            elif len(digest) != self.digest_size:
+                raise ValueError(
+                    f"digest of '{match.group('file')}' has {len(digest)} bytes, expected {self.digest_size}")
+
+            directory, name = os.path.split(
+                os.path.normpath(os.path.join(parent, match.group('file'))))
+
+            self._dirs.append(sys.intern(directory))
+            self._names.append(name)
+            self._digests += digest
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.root}', algorithm='{self.algorithm}')"
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[Tuple[Path, str]]:
+        for i in range(len(self)):
+            yield self.file(i), self.hexdigest(i)
+
+    def __contains__(self, file) -> bool:
+        try:
+            self.index(file)
+            return True
+        except KeyError:
+            return False
+
+    def __getitem__(self, file) -> str:
+        return self.hexdigest(self.index(file))
+
+    def index(self, file) -> int:
+        ''' position of a file, the lookup table is only built on the first call '''
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(zip(self._dirs, self._names))}
+
+        key = os.path.split(os.path.abspath(file))
+
+        return self._index[key]
+
+    def file(self, i: int) -> Path:
+        return Path(self._dirs[i], self._names[i])
+
+    def files(self) -> Iterator[Path]:
+        return map(self.file, range(len(self)))
+
+    def digest(self, i: int) -> bytes:
+        size = self.digest_size
+
+        if i < 0:
+            i += len(self)
+
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        return bytes(self._digests[i * size:(i + 1) * size])
+
+    def hexdigest(self, i: int) -> str:
+        return self.digest(i).hex().upper()
+
+    def verify(self, fail_fast: bool = False, **kwargs) -> Iterator[Tuple[Path, str]]:
+        ''' like HashFile.verify in the order of the manifest, digests are compared as raw bytes '''
+        digest = functools.partial(_rawdigest, self.algorithm, self.digest_size)
+
+        # the position of a result is its index, a file may be listed more than once
+        results = PathList().apply_iter(digest, self.files(), **{**kwargs, 'ordered': True})
+
+        try:
+            for i, (file, result) in enumerate(results):
+                if not result:
+                    verdict = 'missing'
+                elif result == self.digest(i):
+                    verdict = 'match'
+                else:
+                    verdict = 'modified'
+
+                yield file, verdict
+
+                if fail_fast and verdict != 'match':
+                    break
+        finally:
+            results.close()
+
+    def changed(self, **kwargs) -> bool:
+        for _, verdict in self.verify(fail_fast=True, **kwargs):
+            if verdict != 'match':
+                return True
+
+        return False
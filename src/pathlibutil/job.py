@@ -1,10 +1,31 @@
+import concurrent.futures as cf
 import itertools
 import re
-from typing import Dict
+import time
+from typing import Dict, List, NamedTuple, Tuple
 
+from . import matcher
 from .pathutil import Path
 
 
+class JobReport(NamedTuple):
+    plan: List[Tuple[Path, Path]]
+    hits: List[int]
+    copied: int
+    skipped: int
+    bytes: int
+    elapsed: float
+    conflicts: List[Tuple[Path, Path]]
+
+
+def _copy(item: Tuple[Path, Path]) -> Tuple[int, int]:
+    source, destination = item
+
+    _, copied = source.copy(destination.parent, preserve_times=True)
+
+    return copied, source.stat().st_size if copied else 0
+
+
 class JobFile:
     regex = re.compile(
         r"(?P<quote>[\"']?)(?P<value>.*?)(?P=quote)(?:$|\s+)")
@@ -87,24 +108,68 @@ def __init__(self, jobfile, rootdir=None, exclude=None):
     def __repr__(self):
         return f"{self.__class__.__name__}('{self._job}', rootdir='{self._root}', exclude={self._exclude})"
 
+    def _excludes(self, exclude: str) -> list[str]:
+        try:
+            exclude = exclude.split(';')
+            exclude.extend(self._exclude)
+        except AttributeError:
+            exclude = self._exclude
+        except TypeError:
+            pass
+
+        return exclude
+
     def __iter__(self):
-        self._hits = list()
+        jobs = [(pattern, path, matcher.exclude(self._excludes(exclude)))
+                for pattern, path, exclude in super().__iter__()]
+
+        # only patterns which the walk matches exactly like rglob have a matcher
+        globs = [Path._glob_matcher(pattern) for pattern, _, _ in jobs]
+
+        self._hits = [0] * len(jobs)
 
-        for pattern, path, exclude in super().__iter__():
+        if any(globs):
+            yield from self._search(globs, jobs)
 
-            try:
-                exclude = exclude.split(';')
-                exclude.extend(self._exclude)
-            except AttributeError:
-                exclude = self._exclude
-            except TypeError:
-                pass
+        yield from self._search_lines(jobs, [i for i, glob in enumerate(globs) if glob is None])
 
-            i = 0
-            for i, item in enumerate(Path(self._root).rglob(pattern, exclude), start=1):
+    def _search(self, globs, jobs):
+        ''' walks rootdir once and passes each item to all matching job lines with a matcher '''
+        lines = [(i, glob, path, exclude)
+                 for i, (glob, (_, path, exclude)) in enumerate(zip(globs, jobs)) if glob]
+
+        excludes = [exclude for _, _, _, exclude in lines]
+
+        def prune(directory: Path) -> bool:
+            return all(exclude and exclude.prune(directory) for exclude in excludes)
+
+        for item, relative in Path(self._root)._tree(prune):
+            excluded = dict()
+
+            for i, glob, path, exclude in lines:
+                if not glob(relative):
+                    continue
+
+                if exclude:
+                    try:
+                        skip = excluded[exclude]
+                    except KeyError:
+                        skip = excluded[exclude] = exclude(item)
+
+                    if skip:
+                        continue
+
+                self._hits[i] += 1
+                yield item, path
+
+    def _search_lines(self, jobs, lines):
+        ''' one rglob for each of the job lines '''
+        for i in lines:
+            pattern, path, exclude = jobs[i]
+
+            for item in Path(self._root).rglob(pattern, exclude):
+                self._hits[i] += 1
                 yield item, path
-            else:
-                self._hits.append(i)
 
     @property
     def hits(self):
@@ -112,3 +177,73 @@ def hits(self):
             return self._hits
         except AttributeError:
             return [0] * len(self)
+
+    @staticmethod
+    def uptodate(source: Path, destination: Path) -> bool:
+        ''' destination has the same size and is not older than source '''
+        try:
+            dst = destination.stat()
+        except FileNotFoundError:
+            return False
+
+        src = source.stat()
+
+        return dst.st_size == src.st_size and dst.st_mtime_ns >= src.st_mtime_ns
+
+    def plan(self, target: str = None) -> Tuple[List[Tuple[Path, Path]], int, List[Tuple[Path, Path]]]:
+        '''
+        deduplicated (source, destination) pairs which need a copy, the number of up to date
+        destinations and the conflicts, pairs whose destination was already claimed by another
+        source. target defaults to rootdir.
+        '''
+        plan = list()
+        claimed = dict()
+        skipped = 0
+        conflicts = list()
+
+        if target is None:
+            target = self._root
+
+        for item, path in self:
+            if not item.is_file():
+                continue
+
+            destination = Path(target, path, item.name)
+
+            # the same file matched by several lines is planned once
+            if destination in claimed:
+                if claimed[destination] != item and (item, destination) not in conflicts:
+                    conflicts.append((item, destination))
+
+                continue
+
+            claimed[destination] = item
+
+            if self.uptodate(item, destination):
+                skipped += 1
+            else:
+                plan.append((item, destination))
+
+        return plan, skipped, conflicts
+
+    def execute(self, target: str = None, *, executor: cf.Executor = None, max_workers: int = None, dry_run: bool = False) -> JobReport:
+        ''' copies all files found by the job into target/destination in a thread pool, target defaults to rootdir '''
+        start = time.perf_counter()
+
+        plan, skipped, conflicts = self.plan(target)
+
+        if dry_run or not plan:
+            return JobReport(plan, self.hits, 0, skipped, 0, time.perf_counter() - start, conflicts)
+
+        pool = executor or cf.ThreadPoolExecutor(max_workers)
+
+        try:
+            results = list(pool.map(_copy, plan))
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+        copied = sum(copied for copied, _ in results)
+        size = sum(size for _, size in results)
+
+        return JobReport(plan, self.hits, copied, skipped, size, time.perf_counter() - start, conflicts)
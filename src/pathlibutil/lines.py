@@ -0,0 +1,210 @@
+'''
+byte offsets of the line starts of a text file for random access to its lines
+
+lines end with b'\r\n', b'\n' or b'\r' like the universal newlines of iter_lines,
+so the index only fits encodings which are ascii compatible, e.g. utf-8 or latin-1.
+
+recent indexes are kept in memory, index files are only written into a directory
+which was opted in. an index file consists of a header with the size, the modification time and the
+number of lines of the indexed file followed by the offsets as native uint64.
+'''
+import array
+import collections
+import hashlib
+import itertools
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import BinaryIO, Iterable, List, Optional, Self, Tuple, Union
+
+_eol = re.compile(rb'\r\n|\r|\n')
+
+_header = struct.Struct('=QQQ')
+
+# recently used indexes by (st_dev, st_ino), limited by the size of their offsets
+_recent = collections.OrderedDict()
+_recent_lock = threading.Lock()
+_recent_bytes = 2**27
+
+
+class LineIndex:
+    ''' start offsets of all lines, valid as long as size and mtime of the file do not change '''
+
+    def __init__(self, offsets: Union[array.array, memoryview], size: int, mtime_ns: int):
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(lines={len(self)}, size={self.size})"
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def span(self, line: int) -> Tuple[int, int]:
+        ''' start and end offset of a line including its line ending '''
+        if line < 0:
+            line += len(self)
+
+        start = self.offsets[line]
+        end = self.offsets[line + 1] if line + 1 < len(self) else self.size
+
+        return start, end
+
+    def valid(self, stat: os.stat_result) -> bool:
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def build(cls, chunks: Iterable[bytes], stat: os.stat_result) -> Self:
+        ''' one pass over bytes-like chunks which support split like bytes or bytearray '''
+        offsets = array.array('Q')
+        position = 0
+        cr = False
+
+        for chunk in chunks:
+            # b'\r\n' split across two chunks, the line starts after b'\n'
+            if cr and chunk[:1] == b'\n':
+                offsets.pop()
+
+            if b'\r' in chunk:
+                offsets.extend(position + match.end() for match in _eol.finditer(chunk))
+            else:
+                lengths = map((1).__add__, map(len, chunk.split(b'\n')))
+                ends = itertools.accumulate(lengths, initial=position)
+
+                offsets.extend(itertools.islice(ends, 1, chunk.count(b'\n') + 1))
+
+            position += len(chunk)
+            cr = chunk[-1:] == b'\r'
+
+        # every line ending starts a new line, except the one at the end of the file
+        if offsets and offsets[-1] == position:
+            offsets.pop()
+
+        if position:
+            offsets.insert(0, 0)
+
+        return cls(offsets, stat.st_size, stat.st_mtime_ns)
+
+    def save(self, filename: str) -> None:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        temp = f"{filename}.{os.getpid()}.tmp"
+
+        with open(temp, mode='wb') as f:
+            f.write(_header.pack(self.size, self.mtime_ns, len(self)))
+            f.write(memoryview(self.offsets).cast('B'))
+
+        os.replace(temp, filename)
+
+    @classmethod
+    def load(cls, filename: str) -> Self:
+        ''' the offsets are mapped from the file, only the accessed pages are read '''
+        with open(filename, mode='rb') as f:
+            header = f.read(_header.size)
+
+            try:
+                size, mtime_ns, count = _header.unpack(header)
+            except struct.error:
+                raise ValueError(f"invalid line index '{filename}'")
+
+            if os.fstat(f.fileno()).st_size != _header.size + 8 * count:
+                raise ValueError(f"invalid line index '{filename}'")
+
+            if not count:
+                return cls(array.array('Q'), size, mtime_ns)
+
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(memoryview(mm)[_header.size:].cast('Q'), size, mtime_ns)
+
+    @staticmethod
+    def cachefile(filename: Union[str, os.PathLike], directory: Union[str, os.PathLike]) -> str:
+        ''' index file of a file in directory, named by the digest of its absolute path '''
+        name = hashlib.sha1(os.fsencode(os.path.abspath(filename))).hexdigest()
+
+        return os.path.join(directory, f"{name}.idx")
+
+
+def recall(stat: os.stat_result) -> Optional[LineIndex]:
+    ''' index of a file kept in memory, as long as the file was not modified '''
+    key = (stat.st_dev, stat.st_ino)
+
+    with _recent_lock:
+        index = _recent.get(key)
+
+        if index is None:
+            return None
+
+        if not index.valid(stat):
+            del _recent[key]
+            return None
+
+        _recent.move_to_end(key)
+
+    return index
+
+
+def remember(stat: os.stat_result, index: LineIndex) -> None:
+    ''' keeps the index in memory, the least recently used ones are dropped beyond 128 MiB '''
+    key = (stat.st_dev, stat.st_ino)
+
+    with _recent_lock:
+        _recent[key] = index
+        _recent.move_to_end(key)
+
+        while sum(8 * len(i) for i in _recent.values()) > _recent_bytes:
+            _recent.popitem(last=False)
+
+
+def clear() -> None:
+    with _recent_lock:
+        _recent.clear()
+
+
+def tail(file: BinaryIO, n: int, size: int = 2**16) -> List[bytes]:
+    ''' last n lines of a binary file without their line endings, the file is read backwards in chunks of size '''
+    if n <= 0:
+        return []
+
+    chunks = list()
+    breaks = 0
+
+    position = file.seek(0, os.SEEK_END)
+
+    if not position:
+        return []
+
+    file.seek(max(position - 2, 0))
+    last = file.read()
+
+    # the line ending at the end of the file does not start another line
+    if last.endswith(b'\r\n'):
+        position -= 2
+    elif last.endswith((b'\r', b'\n')):
+        position -= 1
+
+    while position and breaks < n:
+        step = min(size, position)
+        position -= step
+
+        file.seek(position)
+        chunk = file.read(step)
+
+        breaks += len(_eol.findall(chunk))
+
+        # b'\r\n' split across two chunks is a single line ending
+        if chunks and chunk.endswith(b'\r') and chunks[-1].startswith(b'\n'):
+            breaks -= 1
+
+        chunks.append(chunk)
+
+    data = b''.join(reversed(chunks))
+
+    if position:
+        # drop the partial line in front of the first line ending
+        data = data[_eol.search(data).end():]
+
+    return _eol.split(data)[-n:]
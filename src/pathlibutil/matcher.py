@@ -0,0 +1,87 @@
+import fnmatch
+import functools
+import os
+import re
+from typing import Callable, Iterable, Optional, Sequence, Tuple, Union
+
+
+class Exclude:
+    ''' fnmatch patterns compiled into a single regular expression '''
+
+    def __init__(self, patterns: Tuple[str, ...]):
+        self.patterns = patterns
+
+        self._match = self.compile(patterns)
+
+        # '*' matches across separators, so 'prefix*' excludes every descendant
+        # of a directory as soon as 'directory/' itself matches the pattern
+        self._prune = self.compile(p for p in patterns if p.endswith('*'))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.patterns})"
+
+    @staticmethod
+    def compile(patterns: Iterable[str]) -> Optional[Callable[[str], Optional[re.Match]]]:
+        regex = [fnmatch.translate(os.path.normcase(p)) for p in patterns]
+
+        if not regex:
+            return None
+
+        return re.compile('|'.join(regex)).match
+
+    def __call__(self, path: Union[str, os.PathLike]) -> bool:
+        ''' True if the path matches any exclude pattern '''
+        return self._match(os.path.normcase(os.fspath(path))) is not None
+
+    def prune(self, directory: Union[str, os.PathLike]) -> bool:
+        ''' True if every descendant of the directory is excluded '''
+        if self._prune is None:
+            return False
+
+        name = os.path.normcase(os.fspath(directory)) + os.sep
+
+        return self._prune(name) is not None
+
+
+@functools.lru_cache(maxsize=256)
+def _exclude(patterns: Tuple[str, ...]) -> Exclude:
+    return Exclude(patterns)
+
+
+def exclude(patterns: Union[Iterable[str], Exclude, None]) -> Optional[Exclude]:
+    ''' compiled and cached matcher for a list of exclude patterns '''
+    if not patterns:
+        return None
+
+    if isinstance(patterns, Exclude):
+        return patterns
+
+    return _exclude(tuple(patterns))
+
+
+class Glob:
+    ''' relative glob pattern matched against the trailing parts of a path, like PurePath.match '''
+
+    def __init__(self, parts: Sequence[str], case_sensitive: bool = True):
+        flags = 0 if case_sensitive else re.IGNORECASE
+
+        self.parts = tuple(parts)
+        self._match = [re.compile(fnmatch.translate(part), flags).match
+                       for part in self.parts]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.parts})"
+
+    def __call__(self, parts: Sequence[str]) -> bool:
+        n = len(self._match)
+
+        if len(parts) < n:
+            return False
+
+        return all(match(part) for match, part in zip(self._match, parts[-n:]))
+
+
+@functools.lru_cache(maxsize=256)
+def glob(parts: Tuple[str, ...], case_sensitive: bool = True) -> Glob:
+    ''' compiled and cached matcher for the parts of a relative glob pattern '''
+    return Glob(parts, case_sensitive)
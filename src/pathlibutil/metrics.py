@@ -0,0 +1,76 @@
+'''
+events emitted while instrumentation is enabled, value is added to the counter of the event
+
+    bytes_read      bytes read by iter_bytes, iter_buffers, digests and counting
+    files_hashed    files read to calculate digests
+    scandir         directories listed by iterdir, getsize, disk_usage and rglob
+    stat            stat calls of getsize, disk_usage and cached.Path
+    cache_hit       digests and counts served by cached.Path
+    cache_miss      digests and counts computed by cached.Path
+    apply           seconds spent on a single file in PathList.apply, data: path
+    progress        finished files of HashList.hexdigest, data: path, done, total
+'''
+import collections
+import contextlib
+import threading
+from typing import Callable, Iterator, Optional
+
+active = None
+
+
+class Metrics:
+    ''' thread-safe counters and callbacks for the I/O and hashing hot paths '''
+
+    def __init__(self):
+        self.counters = collections.Counter()
+
+        self._callbacks = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, event: str) -> float:
+        return self.counters[event]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.counters)})"
+
+    def subscribe(self, event: str, callback: Callable[..., None]) -> None:
+        ''' callback(event, value, **data) is called on every emit of the event '''
+        self._callbacks[event].append(callback)
+
+    def emit(self, event: str, value: float = 1, **data) -> None:
+        with self._lock:
+            self.counters[event] += value
+
+        for callback in self._callbacks.get(event, ()):
+            callback(event, value, **data)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+
+
+def enable(metrics: Optional[Metrics] = None) -> Metrics:
+    ''' hot paths only check for an active instance, so disabled instrumentation costs nothing '''
+    global active
+
+    active = metrics if metrics is not None else Metrics()
+
+    return active
+
+
+def disable() -> None:
+    global active
+
+    active = None
+
+
+@contextlib.contextmanager
+def instrument(metrics: Optional[Metrics] = None) -> Iterator[Metrics]:
+    global active
+
+    previous = active
+
+    try:
+        yield enable(metrics)
+    finally:
+        active = previous
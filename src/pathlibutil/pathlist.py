@@ -1,7 +1,60 @@
+import asyncio
+import collections
 import concurrent.futures as cf
-from typing import Any, Callable
+import functools
+import hashlib
+import itertools
+import os
+import stat
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Self, Tuple, Union
 
-from .pathutil import Path
+from . import matcher, metrics
+from .pathutil import Path, scantree
+
+
+def _call(func: Callable[[Path], Any], item: Path) -> Any:
+    m = metrics.active
+
+    if m is not None:
+        start = time.perf_counter()
+
+    try:
+        return func(item)
+    except (FileNotFoundError, PermissionError):
+        return None
+    finally:
+        if m is not None:
+            m.emit('apply', time.perf_counter() - start, path=item)
+
+
+def _call_chunk(func: Callable[[Path], Any], chunk: Tuple[Path, ...]) -> list[Any]:
+    return [_call(func, item) for item in chunk]
+
+
+def _sample(size: int, item: Path) -> bytes:
+    ''' digest of the first and last size bytes, the whole content for small files '''
+    h = hashlib.blake2b()
+
+    with item.open(mode='rb') as f:
+        h.update(f.read(size))
+
+        if f.seek(0, os.SEEK_END) > 2 * size:
+            f.seek(-size, os.SEEK_END)
+        else:
+            f.seek(size)
+
+        h.update(f.read(size))
+
+    return h.digest()
+
+
+def _child(directory: str, name: str) -> str:
+    return name if directory == '.' else os.path.join(directory, name)
+
+
+def _digest(algorithm: str, item: Path) -> bytes:
+    return item.digest(algorithm).digest()
 
 
 class PathList(list):
@@ -37,12 +90,294 @@ def extend(self, other):
             super().extend(self.Path(item) for item in other)
 
     def apply(self, func: Callable[[Path], Any], **kwargs) -> list[Any]:
-        results = list()
-        with cf.ThreadPoolExecutor(**kwargs) as exec:
-            for thread in [exec.submit(func, file) for file in self]:
+        return [result for _, result in self.apply_iter(func, ordered=True, **kwargs)]
+
+    async def apply_async(self, func: Callable[[Path], Any], *, limit: int = None) -> list[Any]:
+        ''' awaits func for every file with at most limit calls at once, plain functions run in a worker thread '''
+        if not limit:
+            limit = min(32, (os.cpu_count() or 1) + 4)
+
+        results = [None] * len(self)
+        items = enumerate(self)
+
+        if asyncio.iscoroutinefunction(func):
+            call = func
+        else:
+            def call(item):
+                return asyncio.to_thread(func, item)
+
+        async def worker():
+            for i, item in items:
                 try:
-                    results.append(thread.result())
-                except (FileNotFoundError, PermissionError) as e:
-                    results.append(None)
+                    results[i] = await call(item)
+                except (FileNotFoundError, PermissionError):
+                    pass
+
+        await asyncio.gather(*(worker() for _ in range(min(limit, len(self)))))
 
         return results
+
+    def strings(self) -> Iterator[str]:
+        ''' items as plain strings '''
+        return map(os.fspath, super().__iter__())
+
+    def apply_iter(self, func: Callable[[Path], Any], iterable: Iterable = None, *, ordered: bool = False, inflight: int = None, executor: Union[str, cf.Executor] = 'threads', chunksize: int = None, raw: bool = False, **kwargs) -> Iterator[Tuple[Path, Any]]:
+        '''
+        yields (path, result) while only a limited number of tasks is in flight.
+
+        executor is 'threads', 'processes' or an instance of concurrent.futures.Executor,
+        kwargs are passed to the executor and chunksize files are sent to a worker at once.
+        with raw func gets plain strings, e.g. for functions which only open() the file.
+        '''
+        if iterable is None:
+            iterable = self.strings() if raw else self
+
+        if isinstance(executor, cf.Executor):
+            pool, shutdown = executor, False
+            workers = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+        elif executor == 'threads':
+            pool, shutdown = cf.ThreadPoolExecutor(**kwargs), True
+            workers = pool._max_workers
+        elif executor == 'processes':
+            pool, shutdown = cf.ProcessPoolExecutor(**kwargs), True
+            workers = pool._max_workers
+        else:
+            raise ValueError(
+                f"executor has to be 'threads', 'processes' or an Executor, not {executor!r}")
+
+        if not chunksize:
+            chunksize = 1 if executor == 'threads' else 16
+
+        if not inflight:
+            inflight = 2 * workers
+
+        items = map(os.fspath, iterable) if raw else map(self.Path, iterable)
+        chunks = self._chunks(items, chunksize)
+
+        try:
+            if ordered:
+                yield from self._ordered(pool, func, chunks, inflight)
+            else:
+                yield from self._completed(pool, func, chunks, inflight)
+        finally:
+            if shutdown:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def duplicates(self, algorithm: str = None, *, sample: int = 2**12, **kwargs) -> List[Self]:
+        '''
+        groups of files with identical content, files are compared by size, then by a digest
+        of their first and last sample bytes and only then by a digest of the whole content.
+
+        hardlinks to the same inode are grouped without reading and only one of them is hashed,
+        a path listed more than once counts once. kwargs are passed to apply_iter.
+        '''
+        algorithm = Path.algorithm(algorithm)
+
+        inodes = dict()
+        lengths = dict()
+        sizes = collections.defaultdict(list)
+
+        for item in self:
+            try:
+                st = item.lstat()
+            except (FileNotFoundError, PermissionError):
+                continue
+
+            # a symlink is not a duplicate of its target, removing one of them breaks the other
+            if not stat.S_ISREG(st.st_mode):
+                continue
+
+            key = (st.st_dev, st.st_ino)
+
+            try:
+                # the same path listed twice is not a duplicate of itself
+                if item not in inodes[key]:
+                    inodes[key].append(item)
+            except KeyError:
+                inodes[key] = [item]
+                lengths[key] = st.st_size
+                sizes[st.st_size].append(key)
+
+        def regroup(groups: List[List], func: Callable[[Path], Any]) -> List[List]:
+            ''' splits every group of inodes by the result of func for one of its paths '''
+            keys = {inodes[key][0]: (index, key)
+                    for index, group in enumerate(groups) for key in group}
+            results = collections.defaultdict(list)
+
+            for item, value in self.apply_iter(func, keys, ordered=True, **kwargs):
+                if value is not None:
+                    index, key = keys[item]
+                    results[(index, value)].append(key)
+
+            return list(results.values())
+
+        groups = list()
+        candidates = list()
+
+        for size, group in sizes.items():
+            if size == 0 or len(group) == 1:
+                groups.append(group)
+            else:
+                candidates.append(group)
+
+        sampled = regroup(candidates, functools.partial(_sample, sample))
+        candidates = list()
+
+        # a single inode is kept for its hardlinks, small files are covered by their samples
+        for group in sampled:
+            if len(group) == 1 or lengths[group[0]] <= 2 * sample:
+                groups.append(group)
+            else:
+                candidates.append(group)
+
+        groups.extend(regroup(candidates, functools.partial(_digest, algorithm)))
+
+        result = list()
+
+        for group in groups:
+            items = type(self)(item for key in group for item in inodes[key])
+
+            if len(items) > 1:
+                result.append(items)
+
+        return result
+
+    @staticmethod
+    def _chunks(items: Iterator, size: int) -> Iterator[Tuple[Path, ...]]:
+        while True:
+            chunk = tuple(itertools.islice(items, size))
+
+            if not chunk:
+                break
+
+            yield chunk
+
+    @staticmethod
+    def _ordered(pool: cf.Executor, func: Callable, chunks: Iterator, inflight: int) -> Iterator[Tuple[Path, Any]]:
+        pending = collections.deque()
+
+        try:
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_call_chunk, func, chunk)))
+
+                if len(pending) >= inflight:
+                    chunk, future = pending.popleft()
+                    yield from zip(chunk, future.result())
+
+            while pending:
+                chunk, future = pending.popleft()
+                yield from zip(chunk, future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    @staticmethod
+    def _completed(pool: cf.Executor, func: Callable, chunks: Iterator, inflight: int) -> Iterator[Tuple[Path, Any]]:
+        pending = dict()
+
+        try:
+            for chunk in chunks:
+                if len(pending) >= inflight:
+                    done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+
+                    for future in done:
+                        yield from zip(pending.pop(future), future.result())
+
+                pending[pool.submit(_call_chunk, func, chunk)] = chunk
+
+            for future in cf.as_completed(list(pending)):
+                yield from zip(pending.pop(future), future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class LazyPathList(PathList):
+    '''
+    PathList which stores plain strings, Path objects are only created on indexing and
+    iteration. items are compared as strings, e.g. by in, index() and remove().
+    '''
+
+    def __init__(self, iterable=None):
+        try:
+            if isinstance(iterable, LazyPathList):
+                iterable = iterable.strings()
+            else:
+                iterable = map(os.fspath, iterable)
+        except TypeError:
+            iterable = []
+
+        list.__init__(self, iterable)
+
+    def __iter__(self) -> Iterator[Path]:
+        return map(self.Path, super().__iter__())
+
+    def __reversed__(self) -> Iterator[Path]:
+        return map(self.Path, super().__reversed__())
+
+    def __getitem__(self, index):
+        item = super().__getitem__(index)
+
+        if isinstance(index, slice):
+            return type(self)(item)
+
+        return self.Path(item)
+
+    def __setitem__(self, index, item):
+        if isinstance(index, slice):
+            list.__setitem__(self, index, map(os.fspath, item))
+        else:
+            list.__setitem__(self, index, os.fspath(item))
+
+    def __contains__(self, item) -> bool:
+        return super().__contains__(os.fspath(item))
+
+    def __iadd__(self, other) -> Self:
+        self.extend(other)
+
+        return self
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({super().__repr__()})"
+
+    def strings(self) -> Iterator[str]:
+        return super(PathList, self).__iter__()
+
+    def insert(self, index, item):
+        list.insert(self, index, os.fspath(item))
+
+    def append(self, item):
+        list.append(self, os.fspath(item))
+
+    def extend(self, other):
+        list.extend(self, map(os.fspath, other))
+
+    def index(self, item, *args) -> int:
+        return super().index(os.fspath(item), *args)
+
+    def count(self, item) -> int:
+        return super().count(os.fspath(item))
+
+    def remove(self, item):
+        super().remove(os.fspath(item))
+
+    def pop(self, index=-1) -> Path:
+        return self.Path(super().pop(index))
+
+    def copy(self) -> Self:
+        return type(self)(self.strings())
+
+    @classmethod
+    def rglob(cls, root: Union[str, os.PathLike], pattern: str = '*', exclude=None) -> Self:
+        ''' the same items as Path.rglob, patterns of a single part are matched during a walk which only builds strings '''
+        root = Path(root)
+        glob = root._glob_matcher(pattern)
+
+        if glob is None:
+            return cls(root.rglob(pattern, exclude=exclude))
+
+        exclude = matcher.exclude(exclude)
+        prune = exclude.prune if exclude else None
+
+        return cls(path for path, relative in scantree(os.fspath(root), _child, prune)
+                   if glob(relative) and not (exclude and exclude(path)))
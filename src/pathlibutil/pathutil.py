@@ -1,11 +1,51 @@
-import distutils.file_util as dfutil
-import fnmatch
+import asyncio
 import functools
 import hashlib
+import locale
 import os
 import pathlib
 import shutil
-from typing import Any, Optional, Self, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Self, Tuple, Union
+
+from . import copyfile, lines, matcher, metrics, tree, usage
+from .digest import BLAKE2B_TREE, Blake2bTree, blake2b_tree
+
+
+def scantree(root: Any, child: Callable[[Any, str], Any], prune: Callable[[Any], bool] = None) -> Iterator[Tuple[Any, Tuple[str, ...]]]:
+    ''' yields child(directory, name) of all descendants with their relative parts, symlinked directories are not entered '''
+    stack = [(root, ())]
+    m = metrics.active
+
+    while stack:
+        directory, parts = stack.pop()
+
+        if prune and prune(directory):
+            continue
+
+        if m is not None:
+            m.emit('scandir')
+
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except PermissionError:
+            continue
+
+        subdirs = list()
+
+        for entry in entries:
+            item = child(directory, entry.name)
+            relative = parts + (entry.name,)
+
+            yield item, relative
+
+            try:
+                if entry.is_dir() and not entry.is_symlink():
+                    subdirs.append((item, relative))
+            except OSError:
+                pass
+
+        stack.extend(reversed(subdirs))
 
 
 class Path(pathlib.Path):
@@ -20,35 +60,185 @@ class Path(pathlib.Path):
 
     _digest_chunk = 2**20
 
+    _digest_store = None
+
+    _line_index_directory = None
+
     @property
     def default_digest(self) -> str:
         return self._digest_default
 
-    def iter_lines(self, encoding: str = None) -> str:
-        ''' read the content of a file line by line without the line-ending char '''
+    @property
+    def digest_store(self) -> Optional['DigestStore']:
+        return self._digest_store
+
+    @classmethod
+    def set_digest_store(cls, store: Optional['DigestStore']) -> None:
+        ''' opt-in a persistent digest store which is consulted before reading a file '''
+        cls._digest_store = store
+
+    @classmethod
+    def set_line_index_directory(cls, directory: Optional[str]) -> None:
+        ''' opt-in a directory where line indexes are persisted, otherwise they are only kept in memory '''
+        cls._line_index_directory = directory
+
+    def iter_lines(self, encoding: str = None, *, start: int = None, stop: int = None) -> str:
+        ''' read the content of a file line by line without the line-ending char, start and stop seek with the line index '''
+        if start is None and stop is None:
+            offset, count = 0, -1
+        else:
+            index = self.line_index()
+            start, stop, _ = slice(start, stop).indices(len(index))
+
+            offset = index.offsets[start] if start < len(index) else index.size
+            count = max(stop - start, 0)
+
         with super().open(mode='rt', encoding=encoding) as f:
-            while True:
+            f.seek(offset)
+
+            while count:
                 line = f.readline()
 
                 if line:
+                    count -= 1
                     yield line.rstrip('\n')
                 else:
                     break
 
+    def line_index(self, *, directory: str = None, size: int = None) -> 'lines.LineIndex':
+        '''
+        offsets of the line starts, rebuilt when the file was modified. recent indexes are kept
+        in memory and only persisted in directory or the one of set_line_index_directory.
+        '''
+        if not size:
+            size = self._digest_chunk
+
+        if not directory:
+            directory = self._line_index_directory
+
+        stat = self.stat()
+
+        if (index := lines.recall(stat)) is not None:
+            return index
+
+        if directory:
+            cachefile = lines.LineIndex.cachefile(self, directory)
+
+            # the index file is only a cache, it is rebuilt when it can not be read
+            try:
+                index = lines.LineIndex.load(cachefile)
+            except (OSError, ValueError):
+                pass
+            else:
+                if index.valid(stat):
+                    lines.remember(stat, index)
+                    return index
+
+        index = lines.LineIndex.build(self._iter_chunks(size), stat)
+
+        if not index.valid(self.stat()):
+            return index
+
+        lines.remember(stat, index)
+
+        if directory:
+            try:
+                index.save(cachefile)
+            except OSError:
+                pass
+
+        return index
+
+    def line(self, number: int, encoding: str = None) -> str:
+        ''' a single line without the line-ending char, found with the line index '''
+        start, end = self.line_index().span(number)
+
+        with super().open(mode='rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+
+        return data.decode(encoding or locale.getpreferredencoding(False)).rstrip('\r\n')
+
+    def tail(self, n: int, encoding: str = None, *, size: int = None) -> List[str]:
+        ''' the last n lines, the file is read backwards until enough line endings were found '''
+        if not size:
+            size = 2**16
+
+        with super().open(mode='rb') as f:
+            data = lines.tail(f, n, size)
+
+        encoding = encoding or locale.getpreferredencoding(False)
+
+        return [line.decode(encoding) for line in data]
+
     def iter_bytes(self, size: int = None) -> bytes:
         ''' return a chunk of bytes '''
         if not size:
             size = self._digest_chunk
 
+        m = metrics.active
+
         with super().open(mode='rb') as f:
             while True:
                 chunk = f.read(size)
 
                 if chunk:
+                    if m is not None:
+                        m.emit('bytes_read', len(chunk))
+
                     yield chunk
                 else:
                     break
 
+    def iter_buffers(self, size: int = None) -> Iterator[memoryview]:
+        ''' chunks read into one reused buffer, a chunk is only valid until the next one is read '''
+        if not size:
+            size = self._digest_chunk
+
+        m = metrics.active
+
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+
+        with super().open(mode='rb', buffering=0) as f:
+            while n := f.readinto(buffer):
+                if m is not None:
+                    m.emit('bytes_read', n)
+
+                yield view[:n]
+
+    async def aiter_lines(self, encoding: str = None, size: int = None) -> AsyncIterator[str]:
+        ''' like iter_lines, but about size bytes of lines are read at once in a worker thread '''
+        if not size:
+            size = self._digest_chunk
+
+        f = await asyncio.to_thread(super().open, mode='rt', encoding=encoding)
+
+        try:
+            while lines := await asyncio.to_thread(f.readlines, size):
+                for line in lines:
+                    yield line.rstrip('\n')
+        finally:
+            f.close()
+
+    async def aiter_bytes(self, size: int = None) -> AsyncIterator[bytes]:
+        ''' like iter_bytes, but every chunk is read in a worker thread '''
+        if not size:
+            size = self._digest_chunk
+
+        m = metrics.active
+
+        f = await asyncio.to_thread(super().open, mode='rb')
+
+        try:
+            while chunk := await asyncio.to_thread(f.read, size):
+                if m is not None:
+                    m.emit('bytes_read', len(chunk))
+
+                yield chunk
+        finally:
+            f.close()
+
     def relative_to(self: Self, *other, uptree: bool = False) -> Self:
         try:
             return super().relative_to(*other)
@@ -83,10 +273,20 @@ def with_suffix(self: Self, suffix: str, separator: bool = False) -> Self:
 
         return super().with_suffix(f".{suffix}")
 
-    def hexdigest(self, algorithm: str = None, *, size: int = None, length: int = None) -> str:
+    def hexdigest(self, algorithm: str = None, *, size: int = None, length: int = None, workers: int = None) -> str:
         ''' calculate a hashsum using an algorithm '''
-        h = self.digest(algorithm, size=size)
+        h = self.digest(algorithm, size=size, workers=workers)
+
+        return self._hexdigest(h, algorithm, length=length)
+
+    def hexdigests(self, algorithms: Iterable[str], *, size: int = None, length: int = None) -> Dict[str, str]:
+        ''' calculate hashsums for several algorithms while reading the file only once '''
+        hashes = self.digests(algorithms, size=size)
+
+        return {algorithm: self._hexdigest(h, algorithm, length=length) for algorithm, h in hashes.items()}
 
+    @classmethod
+    def _hexdigest(cls, h: 'hashlib._Hash', algorithm: str, /, *, length: int = None) -> str:
         if h.digest_size != 0:
             kwargs = dict()
         else:
@@ -94,8 +294,8 @@ def hexdigest(self, algorithm: str = None, *, size: int = None, length: int = No
                 kwargs = {'length': length}
             else:
                 try:
-                    key = self.algorithm(algorithm)
-                    kwargs = {'length': self._digest_length[key]}
+                    key = cls.algorithm(algorithm)
+                    kwargs = {'length': cls._digest_length[key]}
                 except KeyError:
                     raise TypeError(
                         "hexdigest() missing required argument 'length'")
@@ -106,21 +306,137 @@ def hexdigest(self, algorithm: str = None, *, size: int = None, length: int = No
 
         return h.hexdigest(**kwargs)
 
-    def digest(self, algorithm: str = None, *, size: int = None) -> 'hashlib._Hash':
-        ''' digest of the binary file-content '''
+    def digest(self, algorithm: str = None, *, size: int = None, workers: int = None) -> 'hashlib._Hash':
+        ''' digest of the binary file-content, workers threads hash a single file with 'blake2b-tree' '''
         if not size or size < 0:
             size = self._digest_chunk
 
-        return self._file_digest(self.algorithm(algorithm), _bufsize=size)
+        kwargs = {'_workers': workers} if workers else {}
+
+        return self._file_digest(self.algorithm(algorithm), _bufsize=size, **kwargs)
+
+    def digests(self, algorithms: Iterable[str], *, size: int = None) -> Dict[str, 'hashlib._Hash']:
+        ''' digests of the binary file-content for several algorithms, each chunk is read only once '''
+        if not size or size < 0:
+            size = self._digest_chunk
+
+        algorithms = tuple(dict.fromkeys(map(self.algorithm, algorithms)))
+
+        return self._file_digests(algorithms, _bufsize=size)
+
+    async def ahexdigest(self, algorithm: str = None, *, size: int = None, length: int = None) -> str:
+        ''' like hexdigest, the file is read and hashed chunk by chunk in worker threads '''
+        h = await self.adigest(algorithm, size=size)
+
+        return self._hexdigest(h, algorithm, length=length)
+
+    async def adigest(self, algorithm: str = None, *, size: int = None) -> 'hashlib._Hash':
+        if not size or size < 0:
+            size = self._digest_chunk
+
+        return await self._afile_digest(self.algorithm(algorithm), _bufsize=size)
+
+    async def _afile_digest(self, algorithm: str, /, *, _bufsize: int) -> 'hashlib._Hash':
+        store = self._digest_store
+
+        if store is None:
+            return await self._aread_digest(algorithm, _bufsize=_bufsize)
+
+        stat = await asyncio.to_thread(self.stat)
+        h = await asyncio.to_thread(store.get, stat, algorithm)
+
+        if h is None:
+            h = await self._aread_digest(algorithm, _bufsize=_bufsize)
+
+            after = await asyncio.to_thread(self.stat)
+            if store.key(after) == store.key(stat):
+                await asyncio.to_thread(store.set, stat, algorithm, h)
+
+        return h
+
+    async def _aread_digest(self, algorithm: str, /, *, _bufsize: int) -> 'hashlib._Hash':
+        if algorithm == BLAKE2B_TREE:
+            return await asyncio.to_thread(self._read_digest, algorithm, _bufsize=_bufsize)
+
+        h = hashlib.new(algorithm)
+
+        def update(f) -> int:
+            chunk = f.read(_bufsize)
+            h.update(chunk)
+
+            return len(chunk)
+
+        m = metrics.active
+
+        f = await asyncio.to_thread(super().open, mode='rb')
+
+        try:
+            while size := await asyncio.to_thread(update, f):
+                if m is not None:
+                    m.emit('bytes_read', size)
+        finally:
+            f.close()
+
+        if m is not None:
+            m.emit('files_hashed')
+
+        return h
+
+    def _file_digest(self, algorithm: str, /, *, _bufsize: int, _workers: int = None) -> 'hashlib._Hash':
+        store = self._digest_store
+
+        if store is None:
+            return self._read_digest(algorithm, _bufsize=_bufsize, _workers=_workers)
+
+        compute = functools.partial(
+            self._read_digest, _bufsize=_bufsize, _workers=_workers)
+
+        return store.digest(self, algorithm, compute)
+
+    def _file_digests(self, algorithms: Tuple[str, ...], /, *, _bufsize: int) -> Dict[str, 'hashlib._Hash']:
+        store = self._digest_store
+
+        if store is None:
+            return self._read_digests(algorithms, _bufsize=_bufsize)
+
+        compute = functools.partial(self._read_digests, _bufsize=_bufsize)
+
+        return store.digests(self, algorithms, compute)
+
+    def _read_digest(self, algorithm: str, /, *, _bufsize: int, _workers: int = None) -> 'hashlib._Hash':
+        if algorithm == BLAKE2B_TREE:
+            return blake2b_tree(self, _bufsize, _workers)
 
-    def _file_digest(self, algorithm: str, /, *, _bufsize: int) -> 'hashlib._Hash':
         digest = (lambda: hashlib.new(algorithm))
 
         with self.open(mode='rb') as f:
             h = hashlib.file_digest(f, digest, _bufsize=_bufsize)
 
+            if (m := metrics.active) is not None:
+                m.emit('bytes_read', f.tell())
+                m.emit('files_hashed')
+
         return h
 
+    def _read_digests(self, algorithms: Tuple[str, ...], /, *, _bufsize: int) -> Dict[str, 'hashlib._Hash']:
+        hashes = {algorithm: Blake2bTree() if algorithm == BLAKE2B_TREE else hashlib.new(algorithm)
+                  for algorithm in algorithms}
+
+        updates = [h.update for h in hashes.values()]
+
+        for chunk in self.iter_buffers(_bufsize):
+            for update in updates:
+                update(chunk)
+
+        if (m := metrics.active) is not None:
+            m.emit('files_hashed')
+
+        return hashes
+
+    def tree_digest(self, algorithm: str = None, *, exclude=None, previous: Optional['tree.TreeDigest'] = None, size: int = None, max_workers: int = None) -> 'tree.TreeDigest':
+        ''' merkle digest of a directory, files unchanged since the previous result are not read again '''
+        return tree.build(self, self.algorithm(algorithm), exclude, previous, size, max_workers)
+
     @staticmethod
     def algorithms_available() -> set[str]:
         ''' names of available hash algorithms '''
@@ -146,27 +462,102 @@ def eol_count(self, eol: str = None, size: int = None) -> int:
 
         return self._count(substr, size=size)
 
-    def _count(self, substr: str, /, *, size: int) -> int:
-        return sum(chunk.count(substr) for chunk in self.iter_bytes(size))
+    def eol_counts(self, eols: Iterable[str] = ('\r\n', '\n', '\r'), size: int = None) -> Dict[str, int]:
+        ''' return the number of several end-of-line sequences, counted in a single pass '''
+        eols = tuple(eols)
+
+        if not size:
+            size = self._digest_chunk
+
+        patterns = tuple(dict.fromkeys(eol.encode() for eol in eols))
+        counts = self._counts(patterns, size=size)
+
+        return {eol: counts[eol.encode()] for eol in eols}
+
+    def _count(self, substr: bytes, /, *, size: int) -> int:
+        return self._counts((substr,), size=size)[substr]
+
+    def _counts(self, patterns: Tuple[bytes, ...], /, *, size: int) -> Dict[bytes, int]:
+        if not all(patterns):
+            raise ValueError("count() patterns must not be empty")
+
+        return self._count_chunks(self._iter_chunks(size), patterns)
+
+    def _iter_chunks(self, size: int) -> Iterator[Union[bytearray, bytes]]:
+        ''' chunks of iter_buffers as the reused buffer itself, only the last, shorter one is copied '''
+        for view in self.iter_buffers(size):
+            yield view.obj if len(view) == len(view.obj) else bytes(view)
+
+    @staticmethod
+    def _count_chunks(chunks: Iterable[bytes], patterns: Tuple[bytes, ...]) -> Dict[bytes, int]:
+        ''' same result as bytes.count() for each pattern on the concatenated chunks '''
+        def bordered(p: bytes) -> bool:
+            return any(p[:i] == p[-i:] for i in range(1, len(p)))
+
+        counts = dict.fromkeys(patterns, 0)
+
+        # occurrences of a pattern without a border never overlap, the ones
+        # crossing a chunk boundary are found in the joint of both chunks
+        simple = [p for p in patterns if len(p) == 1 or not bordered(p)]
+        joint = max((len(p) for p in simple), default=1) - 1
+
+        # patterns like b'aa' are searched greedily across chunk boundaries
+        greedy = {p: 0 for p in patterns if p not in simple}
+        keep = max((len(p) for p in greedy), default=1) - 1
+
+        tail = b''
+        data = b''
+
+        for chunk in chunks:
+            for p in simple:
+                counts[p] += chunk.count(p)
+
+                n = len(p) - 1
+                if n and tail:
+                    counts[p] += (tail[-n:] + chunk[:n]).count(p)
+
+            if greedy:
+                offset = max(len(data) - keep, 0)
+                data = data[offset:] + chunk
+
+                for p, start in greedy.items():
+                    start -= offset
+
+                    while (index := data.find(p, max(start, 0))) >= 0:
+                        counts[p] += 1
+                        start = index + len(p)
+
+                    greedy[p] = start
+
+            if joint:
+                tail = chunk[-joint:] if len(chunk) >= joint else (
+                    tail + chunk)[-joint:]
+
+        return counts
 
     def copy(self, dst: Union[str, 'Path'], *, parents: bool = True, **kwargs) -> Tuple['Path', int]:
-        ''' copies self into a new destination, check distutils.file_util::copy_file for kwargs '''
+        ''' copies self into a new destination, check copyfile::copy_file for kwargs '''
 
         if parents is True:
             Path(dst).mkdir(parents=True, exist_ok=True)
 
-        destination, result = dfutil.copy_file(self, dst, **kwargs)
+        destination, result = copyfile.copy_file(self, dst, **kwargs)
 
         return (Path(destination), result)
 
     def move(self, dst: Union[str, 'Path'], *, parents: bool = True, prune: bool = True, **kwargs) -> Tuple['Path', int]:
-        ''' moves self into a new destination '''
+        ''' moves self into a new destination, renames it when possible, check copyfile::move_file for kwargs '''
 
-        destination, result = self.copy(dst, parents=parents, **kwargs)
+        if parents is True:
+            Path(dst).mkdir(parents=True, exist_ok=True)
+
+        destination, result = copyfile.move_file(self, dst, **kwargs)
 
-        if result:
-            prune = False if not prune else 'try'
-            self.unlink(missing_ok=True, prune=prune)
+        if result and prune and not kwargs.get('dry_run'):
+            try:
+                self.parent.rmdir(recursive=False)
+            except OSError:
+                pass
 
         return (Path(destination), result)
 
@@ -222,13 +613,23 @@ def verify(self, hexdigest: str, algorithm: Optional[str] = None, *, size: Optio
             result = self.hexdigest(algorithm, length=digest_size, size=size)
             return algorithm if result == hexdigest else None
 
+        candidates = list()
+
         for algorithm in self.algorithms_available():
             h = hashlib.new(algorithm)
 
             if h.digest_size not in (digest_size, 0):
                 continue
 
-            result = self.hexdigest(algorithm, length=digest_size, size=size)
+            candidates.append(algorithm)
+
+        if not candidates:
+            return None
+
+        hashes = self.digests(candidates, size=size)
+
+        for algorithm, h in hashes.items():
+            result = self._hexdigest(h, algorithm, length=digest_size)
 
             if result == hexdigest:
                 break
@@ -239,39 +640,109 @@ def verify(self, hexdigest: str, algorithm: Optional[str] = None, *, size: Optio
 
     @staticmethod
     def fnmatch(iterator, exclude=None):
+        exclude = matcher.exclude(exclude)
+
         if not exclude:
             yield from iterator()
         else:
             for item in iterator():
-                for pattern in exclude:
-                    if fnmatch.fnmatch(item, pattern):
-                        break
-                else:
+                if not exclude(item):
                     yield item
 
-    def iterdir(self, exclude=None, recursive=False):
-        iterdir = super().iterdir
+    def _walk(self, exclude=None, recursive=False) -> Iterator[Tuple[Self, Optional[os.DirEntry]]]:
+        ''' walks the tree with os.scandir on an explicit stack, yields items with their cached DirEntry '''
+        exclude = matcher.exclude(exclude)
+        m = metrics.active
 
+        def scan(path: Path) -> list[Tuple[Path, os.DirEntry]]:
+            if exclude and exclude.prune(path):
+                return []
+
+            if m is not None:
+                m.emit('scandir')
+
+            with os.scandir(path) as it:
+                entries = [(path._make_child_relpath(entry.name), entry)
+                           for entry in it]
+
+            if not exclude:
+                return entries
+
+            return [(item, entry) for item, entry in entries if not exclude(item)]
+
+        entries = scan(self)
+
+        if not entries:
+            yield self, None
+            return
+
+        stack = [iter(entries)]
+
+        while stack:
+            for item, entry in stack[-1]:
+                if not recursive or not entry.is_dir():
+                    yield item, entry
+                    continue
+
+                entries = scan(item)
+
+                if not entries:
+                    yield item, entry
+                    continue
+
+                stack.append(iter(entries))
+                break
+            else:
+                stack.pop()
+
+    def iterdir(self, exclude=None, recursive=False):
         if not exclude and not recursive:
-            yield from iterdir()
+            yield from super().iterdir()
         else:
-            i = 0
-            for i, item in enumerate(self.fnmatch(iterdir, exclude), start=1):
-                if item.is_file() or not recursive:
-                    yield item
-                else:
-                    yield from item.iterdir(recursive=True, exclude=exclude)
-            else:
-                if not i:
-                    yield self
+            for item, _ in self._walk(exclude, recursive):
+                yield item
+
+    @classmethod
+    def _glob_matcher(cls, pattern: str) -> Optional[matcher.Glob]:
+        '''
+        matcher for single-part patterns which a walk evaluates exactly like rglob, the
+        non-final parts of other patterns may pass through symlinked directories
+        '''
+        drv, root, parts = cls._flavour.parse_parts((pattern,))
+
+        if drv or root or len(parts) != 1:
+            return None
+
+        if '**' in parts[0] or parts[0] == '..':
+            return None
+
+        case_sensitive = cls._flavour.casefold('A') == 'A'
+
+        return matcher.glob(tuple(parts), case_sensitive)
+
+    def _tree(self, prune: Callable[[Self], bool] = None) -> Iterator[Tuple[Self, Tuple[str, ...]]]:
+        ''' yields all descendants with their relative parts like rglob('*'), symlinked directories are not entered '''
+        return scantree(self, type(self)._make_child_relpath, prune)
+
+    def _rglob(self, glob: matcher.Glob, exclude: matcher.Exclude) -> Iterator[Self]:
+        ''' like pathlib.Path.rglob, but directories with only excluded descendants are never entered '''
+        for item, relative in self._tree(exclude.prune):
+            if glob(relative) and not exclude(item):
+                yield item
 
     def rglob(self, pattern, exclude=None):
-        rglob = functools.partial(super().rglob, pattern)
+        exclude = matcher.exclude(exclude)
 
         if not exclude:
-            return rglob()
+            return super().rglob(pattern)
 
-        return self.fnmatch(rglob, exclude)
+        glob = self._glob_matcher(pattern)
+
+        if glob is None:
+            rglob = functools.partial(super().rglob, pattern)
+            return self.fnmatch(rglob, exclude)
+
+        return self._rglob(glob, exclude)
 
     def glob(self, pattern, exclude=None):
         glob = functools.partial(super().glob, pattern)
@@ -282,16 +753,32 @@ def glob(self, pattern, exclude=None):
         return self.fnmatch(glob, exclude)
 
     def getsize(self, recursive=True, exclude=None):
-        def size(p: Path) -> int:
-            if p.is_file():
-                return p.stat().st_size
+        if self.is_file():
+            return self.stat().st_size
 
-            return 0
+        m = metrics.active
 
+        size = 0
+        for _, entry in self._walk(exclude, recursive):
+            if entry is not None and entry.is_file():
+                if m is not None:
+                    m.emit('stat')
+
+                size += entry.stat().st_size
+
+        return size
+
+    def disk_usage(self, exclude=None, *, allocated: bool = False, index: bool = False, max_workers: int = None) -> 'usage.DiskUsage':
+        '''
+        size of all files below the directory scanned in parallel, hardlinks are only counted once.
+
+        allocated counts the blocks on disk instead of the apparent size and index
+        returns the total of every subdirectory from the same scan.
+        '''
         if self.is_file():
-            return size(self)
-        else:
-            file_size = map(size,
-                            self.iterdir(recursive=recursive, exclude=exclude))
+            stat = self.stat()
+            size = stat.st_blocks * 512 if allocated else stat.st_size
+
+            return usage.DiskUsage(size, 1, 0, {self: size} if index else None)
 
-            return sum(file_size)
+        return usage.scan(self, exclude, allocated, index, max_workers)
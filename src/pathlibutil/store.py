@@ -0,0 +1,155 @@
+import contextlib
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .digest import Digest
+
+# connections inherited from the parent process
+_inherited: List[sqlite3.Connection] = list()
+
+
+class DigestStore:
+    ''' persistent digests of files keyed by device, inode, size and modification time '''
+    filename = 'digests.sqlite'
+
+    def __init__(self, directory: str = None):
+        if not directory:
+            directory = self.default_directory()
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+
+        self._pid = None
+        self._connect()
+
+    def _connect(self) -> None:
+        ''' a forked process, e.g. a worker of a process pool, opens its own connection and lock '''
+        if self._pid is not None:
+            # sqlite connections must not be used or closed across fork, the one of the parent is kept
+            _inherited.append(self._db)
+
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(self.directory, self.filename),
+            check_same_thread=False,
+            isolation_level=None
+        )
+
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS digests ('
+            'dev INTEGER, ino INTEGER, size INTEGER, mtime INTEGER, algorithm TEXT, digest BLOB, '
+            'PRIMARY KEY (dev, ino, size, mtime, algorithm)) WITHOUT ROWID'
+        )
+
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        if self._pid != os.getpid():
+            self._connect()
+
+        with self._lock:
+            yield self._db
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.directory}')"
+
+    def __enter__(self) -> 'DigestStore':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        with self._connection() as db:
+            count, = db.execute('SELECT COUNT(*) FROM digests').fetchone()
+
+        return count
+
+    @staticmethod
+    def default_directory() -> str:
+        ''' directory from environment variable PATHLIBUTIL_CACHE or ~/.cache/pathlibutil '''
+        try:
+            return os.environ['PATHLIBUTIL_CACHE']
+        except KeyError:
+            return os.path.join(os.path.expanduser('~'), '.cache', 'pathlibutil')
+
+    @staticmethod
+    def key(stat: os.stat_result) -> Tuple[int, int, int, int]:
+        ''' sqlite integers are signed 64-bit, large device or inode numbers wrap around '''
+        def int64(value: int) -> int:
+            value &= 2**64 - 1
+            return value - 2**64 if value >= 2**63 else value
+
+        return (
+            int64(stat.st_dev),
+            int64(stat.st_ino),
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+    def get(self, stat: os.stat_result, algorithm: str) -> Optional[Digest]:
+        with self._connection() as db:
+            row = db.execute(
+                'SELECT digest FROM digests WHERE dev=? AND ino=? AND size=? AND mtime=? AND algorithm=?',
+                self.key(stat) + (algorithm,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return Digest(algorithm, row[0])
+
+    def set(self, stat: os.stat_result, algorithm: str, h: 'hashlib._Hash') -> None:
+        ''' variable length digests like shake_128 can not be stored '''
+        if h.digest_size == 0:
+            return
+
+        with self._connection() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)',
+                self.key(stat) + (algorithm, h.digest())
+            )
+
+    def digests(self, path: os.PathLike, algorithms: Tuple[str, ...], compute: Callable[[Tuple[str, ...]], Dict[str, 'hashlib._Hash']]) -> Dict[str, 'hashlib._Hash']:
+        ''' lookup digests and compute only the missing algorithms '''
+        stat = os.stat(path)
+
+        hashes = dict()
+        for algorithm in algorithms:
+            h = self.get(stat, algorithm)
+
+            if h is not None:
+                hashes[algorithm] = h
+
+        missing = tuple(a for a in algorithms if a not in hashes)
+
+        if missing:
+            computed = compute(missing)
+
+            after = os.stat(path)
+            if self.key(after) == self.key(stat):
+                for algorithm, h in computed.items():
+                    self.set(stat, algorithm, h)
+
+            hashes.update(computed)
+
+        return {algorithm: hashes[algorithm] for algorithm in algorithms}
+
+    def digest(self, path: os.PathLike, algorithm: str, compute: Callable[[str], 'hashlib._Hash']) -> 'hashlib._Hash':
+        hashes = self.digests(
+            path, (algorithm,), lambda missing: {algorithm: compute(algorithm)})
+
+        return hashes[algorithm]
+
+    def clear(self) -> None:
+        with self._connection() as db:
+            db.execute('DELETE FROM digests')
+
+    def close(self) -> None:
+        with self._connection() as db:
+            db.close()
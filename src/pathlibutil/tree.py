@@ -0,0 +1,161 @@
+'''
+merkle digest of a directory tree
+
+every directory is hashed over the records of its entries, sorted by their
+os.fsencode'd names:
+
+    file        b'F' + name + b'\0' + digest of the file content
+    directory   b'D' + name + b'\0' + digest of the directory records
+    symlink     b'L' + name + b'\0' + digest of the link target, links are not followed
+
+the tree digest is the digest of the root directory, an empty directory hashes
+to the digest of no data. other special files and excluded entries are skipped.
+'''
+import concurrent.futures as cf
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Self, Tuple
+
+from . import matcher
+
+
+class TreeDigest:
+    ''' digests of a directory, its subdirectories and files keyed by relative posix path, '' is the root '''
+
+    def __init__(self, algorithm: str, digests: Dict[str, str], stats: Dict[str, Tuple[int, int]]):
+        self.algorithm = algorithm
+        self.digests = digests
+        self.stats = stats
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.algorithm}', '{self.hexdigest()}')"
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self.algorithm == other.algorithm and self.hexdigest() == other.hexdigest()
+        except AttributeError:
+            return NotImplemented
+
+    def hexdigest(self) -> str:
+        return self.digests['']
+
+    def digest(self) -> bytes:
+        return bytes.fromhex(self.hexdigest())
+
+    def diff(self, other: Self) -> List[str]:
+        ''' relative paths of files and directories which differ, were added or removed '''
+        keys = self.digests.keys() | other.digests.keys()
+
+        return sorted(key for key in keys if self.digests.get(key) != other.digests.get(key))
+
+    def save(self, filename: str) -> None:
+        with open(filename, mode='wt', encoding='utf-8') as f:
+            json.dump({
+                'algorithm': self.algorithm,
+                'digests': self.digests,
+                'stats': self.stats,
+            }, f)
+
+    @classmethod
+    def load(cls, filename: str) -> Self:
+        with open(filename, mode='rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        stats = {key: tuple(value) for key, value in data['stats'].items()}
+
+        return cls(data['algorithm'], data['digests'], stats)
+
+
+def _scan(directory: str, exclude: Optional[matcher.Exclude]) -> List[Tuple[bytes, str, os.DirEntry]]:
+    ''' sorted entries with paths built like pathlib, so exclude patterns match the same strings as in iterdir '''
+    if exclude and exclude.prune(directory):
+        return []
+
+    entries = list()
+
+    with os.scandir(directory) as it:
+        for entry in it:
+            path = entry.name if directory == '.' else entry.path
+
+            if exclude and exclude(path):
+                continue
+
+            entries.append((os.fsencode(entry.name), path, entry))
+
+    return sorted(entries, key=lambda item: item[0])
+
+
+def build(root: 'Path', algorithm: str, exclude=None, previous: Optional[TreeDigest] = None, size: int = None, max_workers: int = None) -> TreeDigest:
+    ''' files with the same size and mtime as in the previous result are not read again '''
+    if hashlib.new(algorithm).digest_size == 0:
+        raise ValueError(f"tree digest requires a fixed digest size, not '{algorithm}'")
+
+    exclude = matcher.exclude(exclude)
+
+    if previous is not None and previous.algorithm != algorithm:
+        previous = None
+
+    listing = dict()
+    stats = dict()
+    rehash = dict()
+
+    # first pass, list all directories and stat the files
+    stack = [('', os.fspath(root))]
+
+    while stack:
+        relative, directory = stack.pop()
+
+        records = list()
+
+        for name, path, entry in _scan(directory, exclude):
+            child = f"{relative}/{entry.name}" if relative else entry.name
+
+            if entry.is_symlink():
+                records.append((b'L', name, child))
+            elif entry.is_dir():
+                records.append((b'D', name, child))
+                stack.append((child, path))
+            elif entry.is_file():
+                stat = entry.stat()
+                stats[child] = (stat.st_size, stat.st_mtime_ns)
+                records.append((b'F', name, child))
+
+                if previous is None or previous.stats.get(child) != stats[child]:
+                    rehash[child] = path
+            else:
+                continue
+
+        listing[relative] = records
+
+    # second pass, hash modified files in parallel
+    digests = dict()
+
+    if rehash:
+        def digest(path: str) -> str:
+            return root.__class__(path).digest(algorithm, size=size).hexdigest()
+
+        with cf.ThreadPoolExecutor(max_workers) as exec:
+            for child, hexdigest in zip(rehash, exec.map(digest, rehash.values())):
+                digests[child] = hexdigest
+
+    for child in stats.keys() - rehash.keys():
+        digests[child] = previous.digests[child]
+
+    # third pass, combine the records bottom-up, children were listed after their parents
+    for relative in reversed(listing):
+        h = hashlib.new(algorithm)
+
+        for kind, name, child in listing[relative]:
+            if kind == b'L':
+                target = os.fsencode(os.readlink(os.path.join(root, child)))
+                value = hashlib.new(algorithm, target).digest()
+                digests[child] = value.hex()
+            else:
+                value = bytes.fromhex(digests[child])
+
+            h.update(kind + name + b'\0' + value)
+
+        digests[relative] = h.hexdigest()
+
+    return TreeDigest(algorithm, digests, stats)
@@ -0,0 +1,113 @@
+'''
+parallel disk usage of a directory tree, like du
+
+every directory is listed by a worker thread, regular files are counted once
+per (st_dev, st_ino) so hardlinks do not add up. symlinks are neither followed
+nor counted and unreadable directories are skipped.
+'''
+import concurrent.futures as cf
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from . import matcher, metrics
+
+
+class DiskUsage(NamedTuple):
+    size: int
+    files: int
+    directories: int
+    index: Optional[Dict['Path', int]]
+
+
+def _scan(directory: 'Path', exclude: Optional[matcher.Exclude], allocated: bool) -> Tuple[List[Tuple[int, int, int, int]], List['Path']]:
+    ''' (st_dev, st_ino, st_nlink, size) of the files and the subdirectories of a directory '''
+    files, subdirs = list(), list()
+
+    if exclude and exclude.prune(directory):
+        return files, subdirs
+
+    m = metrics.active
+
+    if m is not None:
+        m.emit('scandir')
+
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except PermissionError:
+        return files, subdirs
+
+    for entry in entries:
+        item = directory._make_child_relpath(entry.name)
+
+        if exclude and exclude(item):
+            continue
+
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(item)
+                continue
+
+            if not entry.is_file(follow_symlinks=False):
+                continue
+
+            stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+
+        if m is not None:
+            m.emit('stat')
+
+        size = stat.st_blocks * 512 if allocated else stat.st_size
+        files.append((stat.st_dev, stat.st_ino, stat.st_nlink, size))
+
+    return files, subdirs
+
+
+def scan(root: 'Path', exclude=None, allocated: bool = False, index: bool = False, max_workers: int = None) -> DiskUsage:
+    ''' apparent or allocated size of all files below root, index holds the total of every directory '''
+    exclude = matcher.exclude(exclude)
+
+    seen = set()
+    sizes = dict()
+    parents = dict()
+    files = 0
+
+    with cf.ThreadPoolExecutor(max_workers) as exec:
+        pending = {exec.submit(_scan, root, exclude, allocated): root}
+        sizes[root] = 0
+
+        while pending:
+            done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+
+            for future in done:
+                directory = pending.pop(future)
+                entries, subdirs = future.result()
+
+                for dev, ino, nlink, size in entries:
+                    # only files with several links can be seen twice
+                    if nlink > 1:
+                        if (dev, ino) in seen:
+                            continue
+
+                        seen.add((dev, ino))
+
+                    sizes[directory] += size
+                    files += 1
+
+                for subdir in subdirs:
+                    sizes[subdir] = 0
+                    parents[subdir] = directory
+                    pending[exec.submit(_scan, subdir, exclude, allocated)] = subdir
+
+    if not index:
+        return DiskUsage(sum(sizes.values()), files, len(sizes) - 1, None)
+
+    # subdirectories are always discovered after their parent
+    for directory in reversed(sizes):
+        try:
+            sizes[parents[directory]] += sizes[directory]
+        except KeyError:
+            pass
+
+    return DiskUsage(sizes[root], files, len(sizes) - 1, sizes)
@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from pathlibutil.cached import LRUCache, Path
+from pathlibutil.digest import Digest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    Path.cache_clear()
+    yield
+    Path.cache_limits(maxsize=2**16, maxbytes=2**26)
+    Path.cache_clear()
+
+
+@pytest.fixture()
+def tmp_file(tmp_path) -> Path:
+    f = Path(tmp_path, 'file.bin')
+    f.write_bytes(b'foo\nbar!\n')
+
+    return f
+
+
+def test_cached(tmp_file):
+    md5 = hashlib.md5(tmp_file.read_bytes()).hexdigest()
+
+    assert tmp_file.hexdigest() == md5
+    assert Path(str(tmp_file)).hexdigest() == md5
+
+    info = tmp_file.cached()
+    assert info['hits'] == 1
+    assert info['misses'] == 1
+    assert info['entries'] == 1
+
+    assert tmp_file.cached('_file_digest') == {
+        'hits': 1, 'misses': 1, 'evictions': 0}
+
+    assert isinstance(tmp_file.digest(), Digest)
+
+
+def test_cached_kwargs(tmp_file):
+    tmp_file.hexdigest(size=4)
+    tmp_file.hexdigest(size=8)
+
+    assert tmp_file.cached()['misses'] == 2
+
+
+def test_cached_modified(tmp_file):
+    tmp_file.hexdigest()
+    tmp_file.write_bytes(b'changed content')
+
+    assert tmp_file.hexdigest() == hashlib.md5(b'changed content').hexdigest()
+    assert tmp_file.cached()['misses'] == 2
+
+
+def test_cached_shake(tmp_file):
+    tmp_file.hexdigest('shake_128')
+    tmp_file.hexdigest('shake_128')
+
+    assert tmp_file.cached()['entries'] == 0
+
+
+def test_cached_eviction(tmp_path):
+    Path.cache_limits(maxsize=2)
+
+    for i in range(4):
+        f = Path(tmp_path, f"file{i}.txt")
+        f.write_text(str(i))
+        f.hexdigest()
+
+    info = Path.cached()
+    assert info['entries'] == 2
+    assert info['evictions'] == 2
+
+
+def test_lrucache_bytes():
+    c = LRUCache(maxsize=10, maxbytes=1000)
+
+    c.set(('a',), 'f', b'x' * 400)
+    c.set(('b',), 'f', b'x' * 400)
+    assert c.get(('a',), 'f') is not None
+
+    c.set(('c',), 'f', b'x' * 400)
+    assert c.get(('b',), 'f') is None
+    assert c.get(('a',), 'f') is not None
+    assert c.info('f')['evictions'] == 1
+
+
+def test_cached_async(tmp_file):
+    md5 = asyncio.run(tmp_file.ahexdigest())
+
+    assert md5 == hashlib.md5(tmp_file.read_bytes()).hexdigest()
+    assert tmp_file.hexdigest() == md5
+    assert tmp_file.cached('_file_digest') == {
+        'hits': 1, 'misses': 1, 'evictions': 0}
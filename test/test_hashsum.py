@@ -1,7 +1,175 @@
+import hashlib
+
 import pytest
 
-from pathlibutil.hashing import HashSum
+from pathlibutil import Path
+from pathlibutil.hashing import HashFile, HashList, HashSum, Manifest
+
+
+@pytest.fixture()
+def tmp_files(tmp_path):
+    files = list()
+
+    for i in range(3):
+        f = tmp_path / f"file{i}.txt"
+        f.write_bytes(f"content {i}\n".encode())
+        files.append(str(f))
+
+    return files
 
 
 def test_hashsum():
     pass
+
+
+def test_hexdigests(tmp_files):
+    h = HashList(tmp_files + ['file_not_available.txt'], algorithm='md5')
+
+    result = h.hexdigests(['md5', 'sha256'])
+
+    for file, md5, sha256 in zip(tmp_files, result['md5'], result['sha256']):
+        content = open(file, 'rb').read()
+
+        assert md5 == hashlib.md5(content).hexdigest().upper()
+        assert sha256 == hashlib.sha256(content).hexdigest().upper()
+
+    assert result['md5'][-1] is None
+    assert h.hexdigest == result['md5']
+
+
+def test_hashlist_processes(tmp_files):
+    h = HashList(tmp_files, algorithm='sha3_256',
+                 executor='processes', chunksize=2)
+
+    for file, digest in h:
+        content = open(file, 'rb').read()
+
+        assert digest == hashlib.sha3_256(content).hexdigest().upper()
+
+
+def test_hashfile_verify(tmp_files, tmp_path):
+    manifest = tmp_path / 'files.md5'
+
+    HashSum(tmp_files, manifest)
+    h = HashFile(manifest)
+
+    assert sorted(h.verify()) == sorted((Path(f), 'match') for f in tmp_files)
+    assert h.changed() is False
+
+    Path(tmp_files[0]).write_text('modified')
+    Path(tmp_files[1]).unlink()
+
+    result = dict(HashFile(manifest).verify(ordered=True))
+    assert result == {
+        Path(tmp_files[0]): 'modified',
+        Path(tmp_files[1]): 'missing',
+        Path(tmp_files[2]): 'match',
+    }
+
+    result = list(HashFile(manifest).verify(fail_fast=True, ordered=True))
+    assert result == [(Path(tmp_files[0]), 'modified')]
+
+    assert HashFile(manifest).changed() is True
+
+
+def test_hashsum_incremental(tmp_files, tmp_path, monkeypatch):
+    manifest = tmp_path / 'files.md5'
+
+    HashSum(tmp_files, manifest, incremental=True)
+    assert HashSum.sidecar(Path(manifest)).is_file()
+
+    hashed = list()
+    hexdigest = Path.hexdigest
+
+    def counter(self, *args, **kwargs):
+        hashed.append(self.name)
+        return hexdigest(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'hexdigest', counter)
+
+    Path(tmp_files[0]).write_text('modified')
+    new = tmp_path / 'new.txt'
+    new.write_text('new')
+
+    files = tmp_files[:2] + [str(new)]
+    HashSum(files, manifest, incremental=True)
+
+    assert sorted(hashed) == ['file0.txt', 'new.txt']
+
+    result = dict(HashFile(manifest).verify())
+    assert result == {Path(f): 'match' for f in files}
+
+    HashSum(files, manifest)
+    assert not HashSum.sidecar(Path(manifest)).exists()
+
+
+@pytest.mark.parametrize('sidecar', ['[]', '{"algorithm": "md5"}', '{"algorithm": "md5", "files": 1}', '{', 'null'])
+def test_hashsum_incremental_corrupt(tmp_files, tmp_path, sidecar):
+    manifest = tmp_path / 'files.md5'
+
+    HashSum(tmp_files, manifest, incremental=True)
+    HashSum.sidecar(Path(manifest)).write_text(sidecar)
+
+    HashSum(tmp_files, manifest, incremental=True)
+
+    assert HashFile(manifest).changed() is False
+    assert HashSum.sidecar(Path(manifest)).read_text() != sidecar
+
+
+def test_hashsum_blake2b_tree(tmp_files, tmp_path):
+    manifest = tmp_path / 'files.blake2b-tree'
+
+    HashSum(tmp_files, manifest)
+    h = HashFile(manifest)
+
+    assert h.algorithm == 'blake2b-tree'
+    assert [len(hash) for hash in h.hashes] == [128] * len(tmp_files)
+    assert h.changed() is False
+
+
+def test_manifest(tmp_files, tmp_path):
+    tmp_path.joinpath('sub').mkdir()
+    manifest = tmp_path / 'sub' / 'files.sha256'
+
+    HashSum(tmp_files, manifest, comments='manifest')
+
+    h = HashFile(manifest)
+    m = Manifest(manifest)
+
+    assert len(m) == len(h)
+    assert m.algorithm == 'sha256'
+    assert m.digest_size == 32
+    assert m.comments == h.comments
+    assert list(m) == [(file, hash) for file, hash in zip(h.files, h.hashes)]
+
+    for file in tmp_files:
+        assert Path(file) in m
+        assert m[file] == h[Path(file)]
+
+    assert m.digest(-1) == bytes.fromhex(h.hashes[-1])
+
+    relative = tmp_path / 'sub' / 'relative.sha256'
+    relative.write_text(f"{h.hashes[0]} *../{Path(tmp_files[0]).name}\n")
+    assert Manifest(relative)[tmp_files[0]] == h.hashes[0]
+    assert 'file_not_available.txt' not in m
+
+    with pytest.raises(KeyError):
+        m['file_not_available.txt']
+
+    with pytest.raises(IndexError):
+        m.digest(len(m))
+
+    assert m.changed() is False
+
+    Path(tmp_files[0]).write_text('modified')
+    Path(tmp_files[1]).unlink()
+
+    assert dict(m.verify(ordered=True)) == dict(h.verify(ordered=True))
+    assert m.changed() is True
+
+    # a file listed twice is compared with the digest of each line
+    twice = tmp_path / 'sub' / 'twice.sha256'
+    twice.write_text(f"{h.hashes[2]} *{tmp_files[2]}\n{h.hashes[0]} *{tmp_files[2]}\n")
+
+    assert list(Manifest(twice).verify(ordered=False)) == [
+        (Path(tmp_files[2]), 'match'), (Path(tmp_files[2]), 'modified')]
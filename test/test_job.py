@@ -0,0 +1,164 @@
+import os
+
+import pytest
+
+from pathlibutil import Path
+from pathlibutil.job import JobSearch
+
+
+@pytest.fixture()
+def job(tmp_path) -> str:
+    files = [
+        'src/main.py',
+        'src/util.py',
+        'src/data.txt',
+        'doc/readme.txt',
+        '.git/config',
+        '.git/objects/abc.txt',
+    ]
+
+    for f in files:
+        f = Path(tmp_path, f)
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.touch()
+
+    jobfile = Path(tmp_path, 'files.job')
+    jobfile.write_text('\n'.join([
+        '# comment',
+        '*.py bin',
+        '*.txt "text files" */.git/*',
+        'src/*.txt data',
+        'config',
+    ]), encoding='utf-8')
+
+    return str(jobfile)
+
+
+def test_jobsearch(job):
+    search = JobSearch(job)
+
+    assert search.hits == [0, 0, 0, 0]
+
+    result = list(search)
+    assert search.hits == [2, 2, 1, 1]
+
+    assert sorted(result) == sorted(_per_line(search))
+
+    search = JobSearch(job, exclude=['*/.git*'])
+    assert ('.git', 'config') not in [(i.parent.name, i.name)
+                                     for i, _ in search]
+    assert search.hits == [2, 2, 1, 0]
+
+
+def _per_line(search):
+    ''' result of one rglob for each job line '''
+    return [(item, dest) for pattern, dest, exclude in search.lines
+            for item in Path(search._root).rglob(pattern, search._excludes(exclude))]
+
+
+@pytest.mark.parametrize('lines', [
+    ['*.py bin', '*.txt "text files" */.git/*', 'config'],
+    ['*.py bin', 'src/*.txt data', 'config'],
+])
+def test_jobsearch_walk(job, lines, monkeypatch):
+    Path(job).write_text('\n'.join(lines), encoding='utf-8')
+
+    search = JobSearch(job)
+    expected = _per_line(search)
+
+    scanned = list()
+    scandir = os.scandir
+
+    def counter(path='.'):
+        scanned.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', counter)
+
+    # the multi-part lines are searched by their own rglob
+    for pattern, _, _ in search.lines:
+        if '/' in pattern:
+            list(Path(search._root).rglob(pattern))
+
+    rglobs = len(scanned)
+
+    result = list(search)
+    assert sorted(result) == sorted(expected)
+    assert search.hits == [sum(d == dest for _, d in expected) for _, dest, _ in search.lines]
+
+    # the single-part lines share one walk, which lists each of the 5 directories once
+    assert len(scanned) == 2 * rglobs + 5
+
+
+def test_jobsearch_fallback(job):
+    Path(job).write_text('**/*.py bin', encoding='utf-8')
+
+    search = JobSearch(job)
+
+    assert sorted(i.name for i, _ in search) == ['main.py', 'util.py']
+    assert search.hits == [2]
+
+
+def test_jobsearch_execute(job, tmp_path):
+    target = tmp_path / 'target'
+    Path(job).parent.joinpath('src', 'main.py').write_text('print()')
+
+    search = JobSearch(job)
+
+    report = search.execute(target, dry_run=True)
+    assert len(report.plan) == 6
+    assert report.copied == 0
+    assert not target.exists()
+
+    report = search.execute(target, max_workers=2)
+    assert report.copied == 6
+    assert report.skipped == 0
+    assert report.bytes == len('print()')
+    assert report.hits == [2, 2, 1, 1]
+    assert Path(target, 'bin', 'main.py').read_text() == 'print()'
+    assert Path(target, 'text files', 'data.txt').is_file()
+    assert Path(target, 'data', 'data.txt').is_file()
+
+    report = search.execute(target)
+    assert report.plan == []
+    assert report.skipped == 6
+
+
+@pytest.mark.parametrize('lines', [['link/*.txt out'], ['*.py bin', 'link/*.txt out']])
+def test_jobsearch_symlink(job, lines):
+    root = Path(job).parent
+    root.joinpath('src', 'link').symlink_to(root.joinpath('doc'))
+    root.joinpath('doc', 'notes.txt').touch()
+
+    Path(job).write_text('\n'.join(lines), encoding='utf-8')
+
+    search = JobSearch(job)
+    result = sorted(str(i.relative_to(root)) for i, _ in search)
+
+    assert [r for r in result if 'link' in r] == [
+        'src/link/notes.txt', 'src/link/readme.txt']
+    assert search.hits[-1] == 2
+
+
+def test_jobsearch_plan_conflicts(job, tmp_path):
+    root = Path(job).parent
+    for name in ('a', 'b'):
+        root.joinpath('dup', name).mkdir(parents=True)
+        root.joinpath('dup', name, 'x.log').write_text(name)
+
+    Path(job).write_text('*.log out\ndup/a/*.log out', encoding='utf-8')
+
+    search = JobSearch(job)
+    plan, skipped, conflicts = search.plan()
+
+    assert search.hits == [2, 1]
+    assert len(plan) == 1
+    assert skipped == 0
+
+    (source, destination), = plan
+    assert destination == Path(root, 'out', 'x.log')
+    assert conflicts == [(root.joinpath('dup', 'b' if source.parent.name == 'a' else 'a', 'x.log'), destination)]
+
+    report = search.execute(tmp_path / 'target')
+    assert report.copied == 1
+    assert report.conflicts == [(c, Path(tmp_path, 'target', 'out', 'x.log')) for c, _ in conflicts]
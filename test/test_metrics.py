@@ -0,0 +1,57 @@
+import pytest
+
+from pathlibutil import Path, metrics
+from pathlibutil.cached import Path as CachedPath
+from pathlibutil.hashing import HashList
+
+
+@pytest.fixture()
+def tmp_files(tmp_path):
+    files = list()
+
+    for i in range(3):
+        f = Path(tmp_path, 'dir', f"file{i}.txt")
+        f.touch(parents=True)
+        f.write_bytes(b'x' * 100)
+        files.append(f)
+
+    return files
+
+
+def test_disabled(tmp_files):
+    assert metrics.active is None
+
+    tmp_files[0].hexdigest()
+
+
+def test_metrics(tmp_files):
+    progress = list()
+
+    with metrics.instrument() as m:
+        m.subscribe('progress', lambda event, value, **data: progress.append(
+            (data['done'], data['total'])))
+
+        HashList(tmp_files, 'md5').hexdigest
+        tmp_files[0].digests(['md5', 'sha1'])
+        tmp_files[0].parent.getsize()
+
+    assert metrics.active is None
+
+    assert m['bytes_read'] == 400
+    assert m['files_hashed'] == 4
+    assert m['stat'] == 3
+    assert m['scandir'] == 1
+    assert m['apply'] > 0
+    assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_metrics_cached(tmp_files):
+    CachedPath.cache_clear()
+
+    with metrics.instrument() as m:
+        for _ in range(3):
+            CachedPath(tmp_files[0]).hexdigest()
+
+    assert m['cache_miss'] == 1
+    assert m['cache_hit'] == 2
+    assert m['files_hashed'] == 1
@@ -1,6 +1,10 @@
+import asyncio
+import concurrent.futures as cf
+import os
+
 import pytest
 
-from pathlibutil.pathlist import PathList
+from pathlibutil.pathlist import LazyPathList, PathList
 from pathlibutil import Path
 
 
@@ -38,3 +42,178 @@ def suffix(x: Path):
 
     assert names[0] == 'file1'
     assert names[-1] == 'file2'
+
+
+def test_apply_iter():
+    p = PathList()
+
+    def generator():
+        for i in range(100):
+            yield f"file{i}.txt"
+
+    result = list(p.apply_iter(lambda x: x.stem, generator(), inflight=4))
+    assert len(result) == 100
+    assert sorted(stem for _, stem in result) == sorted(
+        f"file{i}" for i in range(100))
+
+    for item, stem in result:
+        assert isinstance(item, Path)
+        assert item.stem == stem
+
+    result = list(p.apply_iter(lambda x: x.stem, generator(), ordered=True,
+                               inflight=3, max_workers=2))
+    assert [stem for _, stem in result] == [f"file{i}" for i in range(100)]
+
+
+def test_apply_iter_missing(tmp_path):
+    p = PathList([tmp_path / 'file_not_available.txt'])
+
+    result = list(p.apply_iter(lambda x: x.read_bytes()))
+    assert result == [(p[0], None)]
+
+    with pytest.raises(ZeroDivisionError):
+        list(p.apply_iter(lambda x: 1 / 0))
+
+
+def stem(x: Path) -> str:
+    return x.stem
+
+
+@pytest.mark.parametrize('executor', ['threads', 'processes'])
+def test_apply_executor(executor):
+    files = [f"file{i}.txt" for i in range(50)]
+    p = PathList(files)
+
+    result = p.apply(stem, executor=executor, chunksize=8, max_workers=2)
+    assert result == [f"file{i}" for i in range(50)]
+
+
+def test_apply_custom_executor():
+    p = PathList(['file1.txt', 'file2.txt'])
+
+    with cf.ThreadPoolExecutor(max_workers=1) as exec:
+        assert p.apply(stem, executor=exec) == ['file1', 'file2']
+        assert exec.submit(stem, Path('file3.txt')).result() == 'file3'
+
+    with pytest.raises(ValueError):
+        p.apply(stem, executor='fubar')
+
+
+def test_apply_async(tmp_path):
+    files = [tmp_path / f"file{i}.txt" for i in range(10)]
+    for f in files:
+        f.write_text(f.name)
+
+    p = PathList(files + [tmp_path / 'file_not_available.txt'])
+
+    async def read(x: Path) -> str:
+        return x.read_text()
+
+    result = asyncio.run(p.apply_async(read, limit=3))
+    assert result == [f.name for f in files] + [None]
+
+    result = asyncio.run(p.apply_async(stem, limit=2))
+    assert result == [f.stem for f in p]
+
+
+def test_duplicates(tmp_path, monkeypatch):
+    head = b'x' * 100
+
+    files = {
+        'a.txt': b'same',
+        'b.txt': b'same',
+        'c.txt': b'other',
+        'empty1': b'',
+        'empty2': b'',
+        'big1': head + b'1' + head,
+        'big2': head + b'2' + head,
+        'big3': head + b'1' + head,
+        'single': b'single',
+    }
+
+    for name, content in files.items():
+        tmp_path.joinpath(name).write_bytes(content)
+
+    os.link(tmp_path / 'single', tmp_path / 'single.link')
+
+    hashed = list()
+    digest = Path.digest
+
+    def counter(self, *args, **kwargs):
+        hashed.append(self.name)
+        return digest(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'digest', counter)
+
+    p = PathList(sorted(tmp_path.iterdir()))
+    p.append(tmp_path / 'missing')
+
+    groups = {tuple(sorted(f.name for f in group))
+              for group in p.duplicates(sample=64)}
+
+    assert groups == {
+        ('a.txt', 'b.txt'),
+        ('empty1', 'empty2'),
+        ('big1', 'big3'),
+        ('single', 'single.link'),
+    }
+
+    assert sorted(hashed) == ['big1', 'big2', 'big3']
+
+    single = tmp_path / 'c.txt'
+    assert PathList([single, str(single)]).duplicates() == []
+
+    groups = PathList([tmp_path / 'a.txt', tmp_path / 'a.txt', tmp_path / 'b.txt']).duplicates()
+    assert groups == [PathList([tmp_path / 'a.txt', tmp_path / 'b.txt'])]
+
+
+def test_duplicates_links(tmp_path):
+    for name, content in (('a', b'x' * 10000), ('b', b'y' * 10000)):
+        tmp_path.joinpath(name).write_bytes(content)
+
+    os.link(tmp_path / 'a', tmp_path / 'hard')
+    tmp_path.joinpath('sym').symlink_to(tmp_path / 'a')
+
+    # b has the same size but another content, the hardlinks are still a group
+    for sample in (64, 2**14):
+        groups = PathList([tmp_path / name for name in ('a', 'b', 'hard')]).duplicates(sample=sample)
+        assert groups == [PathList([tmp_path / 'a', tmp_path / 'hard'])]
+
+    assert PathList([tmp_path / 'a', tmp_path / 'sym']).duplicates() == []
+
+
+def test_lazy_pathlist(tmp_path):
+    for name in ('a.txt', 'b.py', 'sub/c.txt', 'sub/.git/d.txt'):
+        tmp_path.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.joinpath(name).write_text(name)
+
+    p = LazyPathList([tmp_path / 'a.txt', str(tmp_path / 'b.py')])
+    p.append(tmp_path / 'sub' / 'c.txt')
+    p += [tmp_path / 'missing.txt']
+
+    assert all(type(item) is str for item in p.strings())
+    assert all(isinstance(item, Path) for item in p)
+    assert isinstance(p[0], Path) and isinstance(p[1:], LazyPathList)
+    assert p[-1] == Path(tmp_path, 'missing.txt')
+    assert Path(tmp_path, 'b.py') in p
+    assert p.index(tmp_path / 'b.py') == 1
+    assert list(p) == list(PathList(p))
+
+    assert p.apply(lambda x: x.suffix) == ['.txt', '.py', '.txt', '.txt']
+
+    def read(filename):
+        assert type(filename) is str
+        with open(filename) as f:
+            return f.read()
+
+    assert p.apply(read, raw=True) == ['a.txt', 'b.py', 'sub/c.txt', None]
+
+    # the walk does not enter symlinked directories, a pattern through one is resolved
+    tmp_path.joinpath('link').symlink_to(tmp_path / 'sub', target_is_directory=True)
+
+    for pattern in ('*.txt', 'sub/*', '**/*.txt', 'link/*.txt'):
+        for exclude in (None, ['*/.git']):
+            lazy = LazyPathList.rglob(tmp_path, pattern, exclude=exclude)
+            expected = Path(tmp_path).rglob(pattern, exclude=exclude)
+
+            assert sorted(lazy) == sorted(expected)
@@ -1,11 +1,15 @@
+import asyncio
+import fnmatch
 import hashlib
 import inspect
+import os
 import pathlib
 import time
 
 import pytest
 
 from pathlibutil import Path
+from pathlibutil import lines, metrics
 
 CONTENT = 'foo\nbar!\n'
 SEC = 0.02
@@ -138,6 +142,24 @@ def test_verify(tmp_file):
     assert p.verify(shake_128[:32], algorithm='shake_128') == 'shake_128'
 
 
+def test_verify_single_read(tmp_file, monkeypatch):
+    p = Path(tmp_file)
+
+    sha256 = hashlib.sha256(pathlib.Path(tmp_file).read_bytes()).hexdigest()
+
+    reads = list()
+    iter_buffers = Path.iter_buffers
+
+    def counter(self, size=None):
+        reads.append(size)
+        return iter_buffers(self, size)
+
+    monkeypatch.setattr(Path, 'iter_buffers', counter)
+
+    assert p.verify(sha256.upper()) == 'sha256'
+    assert len(reads) == 1
+
+
 def test_hexdigest(tmp_file):
     p = Path(tmp_file)
 
@@ -191,6 +213,25 @@ def test_digest(tmp_file):
     assert p.digest('md5').digest() == md5.digest()
 
 
+def test_digests(tmp_file):
+    p = Path(tmp_file)
+
+    my_bytes = pathlib.Path(tmp_file).read_bytes()
+
+    result = p.digests(['md5', '.SHA256', 'md5'], size=4)
+    assert list(result) == ['md5', 'sha256']
+    assert result['md5'].digest() == hashlib.md5(my_bytes).digest()
+    assert result['sha256'].digest() == hashlib.sha256(my_bytes).digest()
+
+    result = p.hexdigests(['sha1', 'shake_128'], length=10)
+    assert result['sha1'] == hashlib.sha1(my_bytes).hexdigest()
+    assert result['shake_128'] == hashlib.shake_128(my_bytes).hexdigest(10)
+
+    p.unlink()
+    with pytest.raises(FileNotFoundError):
+        p.digests(['md5'])
+
+
 def test_available_algorithm():
     p = Path.algorithms_available()
 
@@ -222,6 +263,25 @@ def test_iter_bytes(tmp_file):
     assert list(my_generator)[0] == str(CONTENT).encode()
 
 
+def test_iter_buffers(tmp_path):
+    p = Path(tmp_path, 'file.bin')
+    content = os.urandom(1000)
+    p.write_bytes(content)
+
+    chunks = list()
+    buffers = set()
+
+    for view in p.iter_buffers(size=64):
+        assert isinstance(view, memoryview)
+
+        chunks.append(bytes(view))
+        buffers.add(id(view.obj))
+
+    assert b''.join(chunks) == content
+    assert [len(chunk) for chunk in chunks] == [64] * 15 + [40]
+    assert len(buffers) == 1
+
+
 def test_copy(tmp_file, dst_path):
     src = Path(tmp_file)
 
@@ -471,3 +531,335 @@ def test_rglob(tmp_dir):
 
     result = list(p.rglob('index', exclude=['*/.venv/*']))
     assert len(result) == 1
+
+
+def test_getsize(tmp_dir):
+    p = Path(tmp_dir)
+
+    for i, f in enumerate(p.iterdir(recursive=True)):
+        if f.is_file():
+            f.write_bytes(b'x' * (i + 1))
+
+    assert p.getsize() == 1 + 2 + 3 + 4 + 5
+    assert p.getsize(recursive=False) == sum(
+        f.stat().st_size for f in p.iterdir() if f.is_file())
+    assert p.getsize(exclude=['*/.git']) == p.getsize() - sum(
+        f.stat().st_size for f in p.joinpath('.git').iterdir())
+
+    assert p.joinpath('fileA.txt').getsize() == p.joinpath(
+        'fileA.txt').stat().st_size
+
+
+def test_iterdir_order(tmp_dir):
+    p = Path(tmp_dir)
+
+    def recursive(path):
+        for item in pathlib.Path(path).iterdir():
+            if item.is_file():
+                yield Path(item)
+            else:
+                yield from recursive(item)
+
+    assert list(p.iterdir(recursive=True)) == list(recursive(p))
+
+
+@pytest.mark.parametrize('pattern', ['*', 'index', '*.txt', '.git/*', 'file?.*', 'link/*.txt'])
+@pytest.mark.parametrize('exclude', [['*/.git/*'], ['*/.git'], ['*.py', '*/.venv*'], ['*/zzz']])
+def test_rglob_exclude(tmp_dir, pattern, exclude):
+    p = Path(tmp_dir)
+    p.joinpath('sub', '.git').mkdir(parents=True)
+    p.joinpath('sub', '.git', 'config.txt').touch()
+    p.joinpath('sub', 'file2.txt').touch()
+    p.joinpath('real').mkdir()
+    p.joinpath('real', 'a.txt').touch()
+    p.joinpath('sub', 'link').symlink_to(p.joinpath('real'))
+
+    expected = [item for item in pathlib.Path(tmp_dir).rglob(pattern)
+                if not any(fnmatch.fnmatch(item, e) for e in exclude)]
+
+    assert sorted(p.rglob(pattern, exclude)) == sorted(expected)
+
+
+def test_rglob_prune(tmp_dir, monkeypatch):
+    p = Path(tmp_dir)
+
+    scanned = list()
+    scandir = os.scandir
+
+    def counter(path):
+        scanned.append(Path(path).name)
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', counter)
+
+    result = list(p.rglob('*', exclude=['*/.git/*', '*/.venv*']))
+    assert sorted(item.name for item in result) == [
+        '.git', 'file1.py', 'fileA.txt']
+    assert '.git' not in scanned
+    assert '.venv' not in scanned
+
+    scanned.clear()
+    result = list(p.iterdir(recursive=True, exclude=['*/.git/*']))
+    assert p.joinpath('.git') in result
+    assert '.git' not in scanned
+
+
+def test_eol_counts(tmp_path):
+    p = Path(tmp_path, 'eol.txt')
+    content = b'a\r\nb\nc\rd\r\n' * 1000 + b'aaa'
+    p.write_bytes(content)
+
+    assert p.eol_counts(size=7) == {
+        '\r\n': 2000, '\n': 3000, '\r': 3000}
+    assert p.eol_count('\r\n', size=2) == content.count(b'\r\n')
+    assert p.eol_count('aa', size=2) == content.count(b'aa')
+
+    empty = Path(tmp_path, 'empty.txt')
+    empty.touch()
+    assert empty.eol_counts(['\n']) == {'\n': 0}
+
+    with pytest.raises(ValueError):
+        p.eol_count('')
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 64])
+def test_count_chunks(size):
+    data = b'aaab\r\n\r\r\nabab\nbaaa' * 5
+    patterns = (b'aa', b'\r\n', b'\r\r', b'abab', b'\n', b'b\r\n\r')
+
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+
+    assert Path._count_chunks(chunks, patterns) == {
+        p: data.count(p) for p in patterns}
+
+
+def test_copy_update(tmp_file, dst_path):
+    src = Path(tmp_file)
+
+    dst, copied = src.copy(dst_path, update=True)
+    assert copied == 1
+    assert dst.read_bytes() == src.read_bytes()
+    assert dst.mtime == src.mtime
+
+    _, copied = src.copy(dst_path, update=True)
+    assert copied == 0
+
+    _, copied = src.copy(dst_path, preserve_times=False)
+    assert copied == 1
+    assert dst.mtime != src.mtime
+
+    _, copied = src.copy(dst_path, dry_run=True)
+    assert copied == 1
+
+    with pytest.raises(FileNotFoundError):
+        Path(dst_path, 'file_not_available.txt').copy(dst_path)
+
+
+@pytest.mark.skipif(not hasattr(os, 'copy_file_range'), reason='os.copy_file_range is not available')
+@pytest.mark.parametrize('limit', [0, 5])
+def test_copy_short(tmp_file, dst_path, monkeypatch, limit):
+    src = Path(tmp_file)
+    copy_file_range = os.copy_file_range
+    copied = list()
+
+    def short(infd, outfd, count):
+        # the kernel stops copying after limit bytes
+        n = copy_file_range(infd, outfd, min(count, limit - sum(copied)))
+        copied.append(n)
+        return n
+
+    monkeypatch.setattr(os, 'copy_file_range', short)
+
+    dst, _ = src.copy(dst_path)
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_move_rename(tmp_file, dst_path):
+    src = Path(tmp_file)
+    inode = src.stat().st_ino
+    mtime = src.mtime
+
+    dst, moved = src.move(dst_path, prune=False)
+
+    assert moved == 1
+    assert src.exists() == False
+    assert src.parent.exists() == True
+    assert dst.stat().st_ino == inode
+    assert dst.mtime == mtime
+
+    _, moved = dst.move(src.parent, dry_run=True)
+    assert moved == 1
+    assert dst.exists() == True
+
+
+def test_async(tmp_file):
+    p = Path(tmp_file)
+
+    async def run():
+        lines = [line async for line in p.aiter_lines(size=1)]
+        chunks = [chunk async for chunk in p.aiter_bytes(size=4)]
+        digest = await p.ahexdigest('sha1', size=4)
+
+        return lines, chunks, digest
+
+    lines, chunks, digest = asyncio.run(run())
+
+    assert lines == list(p.iter_lines())
+    assert b''.join(chunks) == CONTENT.encode()
+    assert len(chunks) == 3
+    assert digest == p.hexdigest('sha1')
+
+
+def test_disk_usage(tmp_dir):
+    p = Path(tmp_dir)
+
+    for i, f in enumerate(p.iterdir(recursive=True)):
+        if f.is_file():
+            f.write_bytes(b'x' * (i + 1))
+
+    result = p.disk_usage()
+
+    assert result.size == p.getsize()
+    assert result.files == 5
+    assert result.index is None
+    assert p.disk_usage(exclude=['*/.git']).size == p.getsize(exclude=['*/.git'])
+
+    os.link(p / 'fileA.txt', p / 'hardlink.txt')
+    p.joinpath('symlink.txt').symlink_to(p / 'fileA.txt')
+
+    assert p.disk_usage().size == result.size
+    assert p.disk_usage().files == result.files
+
+    result = p.disk_usage(index=True)
+
+    assert result.index[p] == result.size
+    assert result.index[p / '.git'] == p.joinpath('.git').getsize()
+    assert result.directories == 2
+
+    files = [f for f in p.iterdir(recursive=True)
+             if f.name not in ('hardlink.txt', 'symlink.txt')]
+
+    assert p.disk_usage(allocated=True).size == sum(
+        f.stat().st_blocks * 512 for f in files)
+
+
+@pytest.mark.parametrize('size', [0, 1, 1024, 1025, 10 * 1024 + 3])
+def test_blake2b_tree(tmp_path, size):
+    from pathlibutil.digest import Blake2bTree, blake2b_tree
+
+    p = Path(tmp_path, 'file.bin')
+    p.write_bytes(os.urandom(size))
+
+    def params(**kwargs):
+        return dict(digest_size=64, fanout=0, depth=2, leaf_size=1024, inner_size=64, **kwargs)
+
+    content = p.read_bytes()
+    leaves = [content[i:i + 1024] for i in range(0, len(content), 1024)] or [b'']
+
+    root = hashlib.blake2b(**params(node_depth=1, last_node=True))
+    for i, leaf in enumerate(leaves):
+        root.update(hashlib.blake2b(leaf, **params(
+            node_offset=i, last_node=i == len(leaves) - 1)).digest())
+
+    for workers in (1, 4):
+        h = blake2b_tree(p, bufsize=100, workers=workers, leaf_size=1024)
+        assert h.hexdigest() == root.hexdigest()
+
+    h = Blake2bTree(content[:100], leaf_size=1024)
+    for i in range(100, len(content), 300):
+        h.update(content[i:i + 300])
+    assert h.digest() == root.digest()
+    assert h.hexdigest() == root.hexdigest()
+
+    with metrics.instrument() as m:
+        p.hexdigests(['md5', 'sha256', 'blake2b-tree'])
+
+    assert m['bytes_read'] == size
+    assert m['files_hashed'] == 1
+
+    assert p.hexdigest('blake2b-tree', workers=4) == p.hexdigest('.BLAKE2B-TREE')
+    assert p.hexdigests(['md5', 'blake2b-tree']) == {
+        'md5': hashlib.md5(content).hexdigest(),
+        'blake2b-tree': p.hexdigest('blake2b-tree'),
+    }
+    assert p.verify(p.hexdigest('blake2b-tree'), 'blake2b-tree') == 'blake2b-tree'
+    assert asyncio.run(p.ahexdigest('blake2b-tree')) == p.hexdigest('blake2b-tree')
+
+
+@pytest.mark.parametrize('content', [
+    b'', b'\n', b'a', b'a\n', b'a\r\nb\rc\nd', b'\r\n\r\n\r\r\n\n', b'first\r\nsecond\r\nthird\r\n',
+])
+@pytest.mark.parametrize('size', [1, 2, 3, 64])
+def test_line_index(tmp_path, monkeypatch, content, size):
+    monkeypatch.setenv('PATHLIBUTIL_CACHE', str(tmp_path / 'cache'))
+    lines.clear()
+
+    p = Path(tmp_path, 'file.txt')
+    p.write_bytes(content * 3)
+
+    expected = list(p.iter_lines(encoding='utf-8'))
+
+    index = p.line_index(size=size)
+    assert len(index) == len(expected)
+    assert p.line_index() is index
+
+    for start, stop in [(0, None), (1, 3), (None, -1), (-2, None), (5, 2), (100, None)]:
+        assert list(p.iter_lines('utf-8', start=start, stop=stop)) == expected[start:stop]
+
+    for number in range(-len(expected), len(expected)):
+        assert p.line(number, encoding='utf-8') == expected[number]
+
+    with pytest.raises(IndexError):
+        p.line(len(expected))
+
+    assert p.tail(0, encoding='utf-8') == []
+
+    for n in range(1, len(expected) + 2):
+        assert p.tail(n, encoding='utf-8', size=size) == expected[-n:]
+
+    assert not tmp_path.joinpath('cache').exists()
+
+
+def test_line_index_persist(tmp_path, monkeypatch):
+    p = Path(tmp_path, 'file.txt')
+    p.write_text('a\nb\nc')
+
+    index = p.line_index(directory=tmp_path / 'cache')
+    assert len(list(tmp_path.joinpath('cache').iterdir())) == 1
+
+    lines.clear()
+    loaded = p.line_index(directory=tmp_path / 'cache')
+
+    assert loaded is not index
+    assert list(loaded.offsets) == list(index.offsets) == [0, 2, 4]
+
+    monkeypatch.setattr(Path, '_line_index_directory', None)
+    Path.set_line_index_directory(str(tmp_path / 'other'))
+    lines.clear()
+
+    assert p.line(-1) == 'c'
+    assert len(list(tmp_path.joinpath('other').iterdir())) == 1
+
+
+def test_line_index_unreadable(tmp_path):
+    p = Path(tmp_path, 'file.txt')
+    p.write_text('a\nb\nc')
+
+    # a directory in place of the index file can neither be loaded nor replaced
+    os.makedirs(lines.LineIndex.cachefile(p, tmp_path / 'cache'))
+
+    lines.clear()
+    assert list(p.line_index(directory=tmp_path / 'cache').offsets) == [0, 2, 4]
+
+
+def test_line_index_modified(tmp_path):
+    p = Path(tmp_path, 'file.txt')
+    p.write_text('a\nb\n')
+
+    assert len(p.line_index(directory=tmp_path / 'cache')) == 2
+
+    p.write_text('a\nb\nc\n')
+    os.utime(p, ns=(0, p.mtime + 10**9))
+
+    assert len(p.line_index(directory=tmp_path / 'cache')) == 3
+    assert len(list(tmp_path.joinpath('cache').iterdir())) == 1
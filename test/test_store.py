@@ -0,0 +1,95 @@
+import asyncio
+import concurrent.futures as cf
+import hashlib
+import multiprocessing
+import os
+
+import pytest
+
+from pathlibutil import Path, PathList
+from pathlibutil.digest import Digest
+from pathlibutil.hashing import HashList
+from pathlibutil.store import DigestStore
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store = DigestStore(tmp_path / 'cache')
+
+    Path.set_digest_store(store)
+    yield store
+    Path.set_digest_store(None)
+
+    store.close()
+
+
+@pytest.fixture()
+def tmp_file(tmp_path) -> Path:
+    f = Path(tmp_path, 'file.bin')
+    f.write_bytes(b'foo\nbar!\n')
+
+    return f
+
+
+def test_store(store, tmp_file, monkeypatch):
+    md5 = hashlib.md5(tmp_file.read_bytes()).hexdigest()
+
+    assert tmp_file.digest_store is store
+    assert tmp_file.hexdigest('md5') == md5
+    assert len(store) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError('file read although digest is stored')
+
+    monkeypatch.setattr(Path, '_read_digest', fail)
+    monkeypatch.setattr(Path, '_read_digests', fail)
+
+    h = Path(tmp_file).digest('md5')
+    assert isinstance(h, Digest)
+    assert h.hexdigest() == md5
+
+    assert HashList([tmp_file], 'md5').hexdigest == [md5.upper()]
+    assert asyncio.run(tmp_file.ahexdigest('md5')) == md5
+
+
+def test_store_modified(store, tmp_file):
+    tmp_file.hexdigests(['md5', 'sha1', 'shake_128'])
+    assert len(store) == 2
+
+    tmp_file.write_bytes(b'changed')
+    assert tmp_file.hexdigest('md5') == hashlib.md5(b'changed').hexdigest()
+    assert len(store) == 3
+
+    store.clear()
+    assert len(store) == 0
+
+
+def test_store_persistent(tmp_path, tmp_file):
+    with DigestStore(tmp_path) as store:
+        store.set(tmp_file.stat(), 'md5', hashlib.md5(b'fake'))
+
+    with DigestStore(tmp_path) as store:
+        h = store.get(tmp_file.stat(), 'md5')
+
+    assert h == Digest('md5', hashlib.md5(b'fake').digest())
+
+
+def _md5(path: Path) -> str:
+    return path.hexdigest('md5')
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is not available')
+def test_store_fork(store, tmp_path):
+    files = PathList(Path(tmp_path, f'{i}.bin') for i in range(4))
+
+    for i, f in enumerate(files):
+        f.write_bytes(bytes(i))
+
+    context = multiprocessing.get_context('fork')
+
+    # a forked worker must neither wait for the lock of the parent nor use its connection
+    with store._lock, cf.ProcessPoolExecutor(2, mp_context=context) as pool:
+        result = files.apply(_md5, executor=pool)
+
+    assert result == [hashlib.md5(bytes(i)).hexdigest() for i in range(4)]
+    assert len(store) == 4
@@ -0,0 +1,77 @@
+import hashlib
+
+import pytest
+
+from pathlibutil import Path
+from pathlibutil.tree import TreeDigest
+
+
+@pytest.fixture()
+def tree(tmp_path) -> Path:
+    files = {
+        'a.txt': b'a',
+        'sub/b.txt': b'b',
+        'sub/deep/c.txt': b'c',
+        'other/d.txt': b'd',
+        '.git/HEAD': b'ref',
+    }
+
+    for name, content in files.items():
+        f = Path(tmp_path, 'root', name)
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_bytes(content)
+
+    Path(tmp_path, 'root', 'empty').mkdir()
+
+    return Path(tmp_path, 'root')
+
+
+def test_tree_digest_format(tmp_path):
+    root = Path(tmp_path)
+    root.joinpath('sub').mkdir()
+    root.joinpath('sub', 'b.txt').write_bytes(b'b')
+    root.joinpath('a.txt').write_bytes(b'a')
+
+    def md5(data):
+        return hashlib.md5(data).digest()
+
+    sub = md5(b'Fb.txt\0' + md5(b'b'))
+    expected = md5(b'Fa.txt\0' + md5(b'a') + b'Dsub\0' + sub)
+
+    result = root.tree_digest('md5')
+    assert result.digest() == expected
+    assert result.digests['sub'] == sub.hex()
+
+
+def test_tree_digest(tree, tmp_path, monkeypatch):
+    first = tree.tree_digest('sha256', exclude=['*/.git'])
+
+    assert '.git/HEAD' not in first.digests
+    assert first.digests['empty'] == hashlib.sha256().hexdigest()
+    assert first == tree.tree_digest('sha256', exclude=['*/.git'])
+
+    first.save(tmp_path / 'tree.json')
+    previous = TreeDigest.load(tmp_path / 'tree.json')
+
+    tree.joinpath('sub', 'deep', 'c.txt').write_bytes(b'changed')
+
+    hashed = list()
+    digest = Path.digest
+
+    def counter(self, *args, **kwargs):
+        hashed.append(self.name)
+        return digest(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'digest', counter)
+
+    second = tree.tree_digest('sha256', exclude=['*/.git'], previous=previous)
+
+    assert hashed == ['c.txt']
+    assert second != first
+    assert second.diff(first) == ['', 'sub', 'sub/deep', 'sub/deep/c.txt']
+    assert second == tree.tree_digest('sha256', exclude=['*/.git'])
+
+
+def test_tree_digest_shake(tree):
+    with pytest.raises(ValueError):
+        tree.tree_digest('shake_128')